@@ -0,0 +1,200 @@
+"""
+Single-file archive of fitting results.
+
+Results are stored by columns in uncompressed .npz file, every column is a separate member of the zip file, so
+reading e.g. only MSE of all results does not read the curves. Curves of all results are concatenated, rows of result
+i are output_x[output_offsets[i]:output_offsets[i + 1]], archive_curve memory-maps the curve columns and reads only
+these rows.
+"""
+import os
+import struct
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from gui_utils import MODELS_PARAMS
+
+ARCHIVE_VERSION = 1
+MAX_PARAMS = max(len(params['csv']) for params in MODELS_PARAMS.values())
+# members are written in chunks of this size, so progress moves while large curve columns are written
+WRITE_CHUNK = 8 * 2 ** 20
+# fixed part of local file header of zip member, followed by its name and extra field
+LOCAL_HEADER = struct.Struct('<4s5H3I2H')
+
+
+def progress_steps(count: int) -> int:
+    """ Number of progress steps of archive of count results: collecting every result and writing its share. """
+    return 2 * count
+
+
+def curves_columns(curves: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    :param curves: (x, y) of every result
+    :return: concatenated x, concatenated y and offsets of results
+    """
+    offsets = np.zeros(len(curves) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(x) for x, _ in curves])
+    if not curves:
+        return np.empty(0), np.empty(0), offsets
+
+    return (np.concatenate([np.asarray(x, dtype=float) for x, _ in curves]),
+            np.concatenate([np.asarray(y, dtype=float) for _, y in curves]), offsets)
+
+
+def save_archive(file_path: Path, results: List[tuple], on_progress: Optional[Callable] = None,
+                 cancelled: Optional[threading.Event] = None) -> bool:
+    """
+    Save results to archive.
+
+    :param file_path: path of .npz file
+    :param results: list of (name, fitting result) pairs
+    :param on_progress: called with number of done steps, see progress_steps
+    :param cancelled: event which stops saving, archive is not written then
+    :return: True if archive was written
+    """
+    n = len(results)
+    params = np.full((n, MAX_PARAMS), np.nan)
+    confidence_interval = np.full((n, MAX_PARAMS, 2), np.nan)
+    confidence_level = np.full((n, MAX_PARAMS), np.nan)
+    beta = np.full(n, np.nan)
+    mse = np.empty(n)
+    me = np.empty(n)
+    outputs = []
+    response_functions = []
+
+    for index, (_, data) in enumerate(results):
+        if cancelled is not None and cancelled.is_set():
+            return False
+
+        params[index, :len(data.params)] = data.params
+        if data.confidence_interval:
+            confidence_interval[index, :len(data.confidence_interval)] = data.confidence_interval
+            confidence_level[index, :len(data.confidence_level)] = data.confidence_level
+        if data.beta is not None:
+            beta[index] = data.beta
+        mse[index] = data.mse
+        me[index] = data.model_efficiency
+
+        outputs.append(data.output)
+        response_functions.append(data.response_function if data.model_type != 'PFM' else ([], []))
+
+        if on_progress:
+            on_progress(index + 1)
+
+    output_x, output_y, output_offsets = curves_columns(outputs)
+    response_x, response_y, response_offsets = curves_columns(response_functions)
+
+    columns = dict(version=np.array(ARCHIVE_VERSION),
+                   name=np.array([name for name, _ in results], dtype=str),
+                   model_type=np.array([data.model_type for _, data in results], dtype=str),
+                   params=params, confidence_interval=confidence_interval, confidence_level=confidence_level,
+                   beta=beta, mse=mse, me=me,
+                   output_x=output_x, output_y=output_y, output_offsets=output_offsets,
+                   response_function_x=response_x, response_function_y=response_y,
+                   response_function_offsets=response_offsets)
+
+    total = sum(column.nbytes for column in columns.values()) or 1
+
+    def on_written(written: int):
+        if on_progress:
+            on_progress(n + n * written // total)
+
+    return write_npz(file_path, columns, on_written, cancelled)
+
+
+def write_npz(file_path: Path, columns: Dict[str, np.ndarray], on_written: Callable,
+              cancelled: Optional[threading.Event] = None) -> bool:
+    """
+    Write arrays to uncompressed .npz file (same as numpy.savez), the file is replaced only when it is completely
+    written.
+
+    :param on_written: called with number of bytes of arrays written so far
+    :return: False if writing was cancelled
+    """
+    file_path = Path(file_path)
+    with tempfile.NamedTemporaryFile(dir=file_path.parent, suffix='.npz', delete=False) as file:
+        try:
+            with zipfile.ZipFile(file, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+                complete = write_members(archive, columns, on_written, cancelled)
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+
+    if not complete:
+        os.remove(file.name)
+        return False
+    os.replace(file.name, file_path)
+
+    return True
+
+
+def write_members(archive: zipfile.ZipFile, columns: Dict[str, np.ndarray], on_written: Callable,
+                  cancelled: Optional[threading.Event]) -> bool:
+    """ Write arrays as .npy members of zip file in chunks, False if writing was cancelled. """
+    written = 0
+    for name, column in columns.items():
+        # ascontiguousarray would make 0-d arrays 1-d
+        column = np.asarray(column)
+        if not column.flags.c_contiguous:
+            column = column.copy()
+        with archive.open(f'{name}.npy', 'w', force_zip64=True) as member:
+            np.lib.format.write_array_header_1_0(member, np.lib.format.header_data_from_array_1_0(column))
+            data = column.reshape(-1).view(np.uint8)
+            for start in range(0, len(data), WRITE_CHUNK):
+                if cancelled is not None and cancelled.is_set():
+                    return False
+                chunk = data[start:start + WRITE_CHUNK]
+                member.write(chunk)
+                written += len(chunk)
+                on_written(written)
+
+    return True
+
+
+def archive_member(archive, name: str) -> np.ndarray:
+    """
+    Column of archive memory-mapped from the file, only sliced parts of it are read.
+
+    :param archive: archive opened by numpy.load from path
+    :param name: name of column
+    """
+    info = archive.zip.getinfo(f'{name}.npy')
+    path = archive.zip.filename
+    if info.compress_type != zipfile.ZIP_STORED or not path:
+        return archive[name]
+
+    with open(path, 'rb') as file:
+        file.seek(info.header_offset)
+        header = LOCAL_HEADER.unpack(file.read(LOCAL_HEADER.size))
+        file.seek(info.header_offset + LOCAL_HEADER.size + header[-2] + header[-1])
+        version = np.lib.format.read_magic(file)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else \
+            np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(file)
+        offset = file.tell()
+
+    if not np.prod(shape):
+        return np.empty(shape, dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape, order='F' if fortran_order else 'C')
+
+
+def archive_curve(archive, name: str, index: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read curve of single result from opened archive.
+
+    :param archive: archive opened by numpy.load
+    :param name: 'output' or 'response_function'
+    :param index: index of result
+    :return: x and y of curve
+    """
+    offsets = archive_member(archive, f'{name}_offsets')
+    start, stop = offsets[index], offsets[index + 1]
+
+    return (np.array(archive_member(archive, f'{name}_x')[start:stop]),
+            np.array(archive_member(archive, f'{name}_y')[start:stop]))
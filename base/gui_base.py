@@ -639,20 +639,20 @@ class Ui_Gui(object):
         self.plotWidgetLayout = QtWidgets.QVBoxLayout(self.plotWidget)
         self.plotWidgetLayout.setObjectName("plotWidgetLayout")
         self.gridLayout.addWidget(self.plotWidget, 0, 0, 1, 1)
-        self.plotListWidget = QtWidgets.QListWidget(self.widget1)
+        self.plotListView = QtWidgets.QListView(self.widget1)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.plotListWidget.sizePolicy().hasHeightForWidth())
-        self.plotListWidget.setSizePolicy(sizePolicy)
-        self.plotListWidget.setMinimumSize(QtCore.QSize(100, 230))
-        self.plotListWidget.setMaximumSize(QtCore.QSize(250, 10000000))
-        self.plotListWidget.setSizeIncrement(QtCore.QSize(100, 100))
-        self.plotListWidget.setLayoutDirection(QtCore.Qt.LeftToRight)
-        self.plotListWidget.setSizeAdjustPolicy(QtWidgets.QAbstractScrollArea.AdjustToContentsOnFirstShow)
-        self.plotListWidget.setLayoutMode(QtWidgets.QListView.SinglePass)
-        self.plotListWidget.setObjectName("plotListWidget")
-        self.gridLayout.addWidget(self.plotListWidget, 0, 1, 1, 1)
+        sizePolicy.setHeightForWidth(self.plotListView.sizePolicy().hasHeightForWidth())
+        self.plotListView.setSizePolicy(sizePolicy)
+        self.plotListView.setMinimumSize(QtCore.QSize(100, 230))
+        self.plotListView.setMaximumSize(QtCore.QSize(250, 10000000))
+        self.plotListView.setSizeIncrement(QtCore.QSize(100, 100))
+        self.plotListView.setLayoutDirection(QtCore.Qt.LeftToRight)
+        self.plotListView.setSizeAdjustPolicy(QtWidgets.QAbstractScrollArea.AdjustToContentsOnFirstShow)
+        self.plotListView.setLayoutMode(QtWidgets.QListView.SinglePass)
+        self.plotListView.setObjectName("plotListView")
+        self.gridLayout.addWidget(self.plotListView, 0, 1, 1, 1)
         self.gridLayout_8.addWidget(self.widget1, 1, 0, 1, 1)
         self.frame = QtWidgets.QFrame(self.page_2)
         self.frame.setMaximumSize(QtCore.QSize(10000000, 85))
@@ -15,29 +15,14 @@ class Ui_Table(object):
         Table.setMinimumSize(QtCore.QSize(900, 300))
         self.gridLayout = QtWidgets.QGridLayout(Table)
         self.gridLayout.setObjectName("gridLayout")
-        self.tableWidget = QtWidgets.QTableWidget(Table)
-        self.tableWidget.setMinimumSize(QtCore.QSize(110, 80))
-        self.tableWidget.setSizeAdjustPolicy(QtWidgets.QAbstractScrollArea.AdjustToContents)
-        self.tableWidget.setObjectName("tableWidget")
-        self.tableWidget.setColumnCount(7)
-        self.tableWidget.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(4, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(5, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(6, item)
-        self.tableWidget.horizontalHeader().setDefaultSectionSize(100)
-        self.tableWidget.horizontalHeader().setStretchLastSection(True)
-        self.gridLayout.addWidget(self.tableWidget, 0, 0, 1, 1)
+        self.tableView = QtWidgets.QTableView(Table)
+        self.tableView.setMinimumSize(QtCore.QSize(110, 80))
+        self.tableView.setSizeAdjustPolicy(QtWidgets.QAbstractScrollArea.AdjustToContents)
+        self.tableView.setSortingEnabled(True)
+        self.tableView.setObjectName("tableView")
+        self.tableView.horizontalHeader().setDefaultSectionSize(100)
+        self.tableView.horizontalHeader().setStretchLastSection(True)
+        self.gridLayout.addWidget(self.tableView, 0, 0, 1, 1)
         self.saveButton = QtWidgets.QToolButton(Table)
         self.saveButton.setMinimumSize(QtCore.QSize(80, 0))
         self.saveButton.setMaximumSize(QtCore.QSize(80, 60))
@@ -50,20 +35,6 @@ class Ui_Table(object):
     def retranslateUi(self, Table):
         _translate = QtCore.QCoreApplication.translate
         Table.setWindowTitle(_translate("Table", "Form"))
-        item = self.tableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("Table", "Name"))
-        item = self.tableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("Table", "Model Type"))
-        item = self.tableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("Table", "Parameters"))
-        item = self.tableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("Table", "Confidence Level"))
-        item = self.tableWidget.horizontalHeaderItem(4)
-        item.setText(_translate("Table", "Beta"))
-        item = self.tableWidget.horizontalHeaderItem(5)
-        item.setText(_translate("Table", "MSE"))
-        item = self.tableWidget.horizontalHeaderItem(6)
-        item.setText(_translate("Table", "ME"))
         self.saveButton.setText(_translate("Table", "Save to csv"))
 
 
@@ -0,0 +1,151 @@
+r"""
+Headless batch runner, fits models to observations of many wells without GUI.
+
+Example:
+    python batch_cli.py --input input.xlsx --observations wells/ --alpha 0.5 \
+        --models '[["EPM", [[1, 100], [1, 3]]], ["EM", [[1, 100]], 0.5]]' --output results
+"""
+import argparse
+import itertools
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from archive import save_archive
+from executors import BACKENDS
+from executors import FitScheduler
+from executors import FitTask
+from gui_utils import collect_data_files
+from gui_utils import parameters_row
+from gui_utils import parse_models_configs
+from gui_utils import result_texts
+from gui_utils import save_parameters
+from gui_utils import save_result
+import run_trace
+from result_cache import result_cache
+from run_trace import event
+from run_trace import span
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Fit lumped parameter models to tritium observations of many wells.')
+    parser.add_argument('--input', required=True, help='input (tritium) data file')
+    parser.add_argument('--observations', required=True, nargs='+',
+                        help='observations files or directories with observations files')
+    parser.add_argument('--alpha', type=float, default=0.5, help='infiltration coefficient')
+    parser.add_argument('--uncertainty', action='store_true', help='calculate params accuracy')
+    parser.add_argument('--models', required=True,
+                        help='JSON file or JSON string with models configurations, '
+                             'e.g. [["EPM", [[1, 100], [1, 3]], 0.5], ["EM", [[1, 100]]]]')
+    parser.add_argument('--output', default='.', help='directory for results')
+    parser.add_argument('--archive', action='store_true',
+                        help='save all results to single .npz archive instead of directory per result')
+    parser.add_argument('--backend', choices=BACKENDS, default=None, help='executor backend')
+    parser.add_argument('--workers', type=int, default=None, help='number of workers')
+    parser.add_argument('--trace', help='append JSON-lines trace of the run to file')
+
+    return parser.parse_args(argv)
+
+
+def load_models(models: str) -> list:
+    """ Load models configurations from JSON file or JSON string. """
+    path = Path(models)
+    text = path.read_text() if path.is_file() else models
+
+    return parse_models_configs(json.loads(text))
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.trace:
+        run_trace.start(args.trace)
+
+    try:
+        return run_batch(args)
+    finally:
+        run_trace.stop()
+
+
+def run_batch(args) -> int:
+    """ Fit all models to all wells and save results, returns exit status. """
+    from tracer_method.core.exceptions import FileException
+    from tracer_method.core.read_data.read_input_file import read_tritium_file
+    from tracer_method.core.read_data.read_observations_file import read_observations
+
+    try:
+        models = load_models(args.models)
+    except ValueError as e:
+        print(f'Models configuration: {e}', file=sys.stderr)
+        return 2
+
+    try:
+        with span('load_file', reader='read_tritium_file', path=args.input, cached=False, source='file'):
+            input_data = read_tritium_file(Path(args.input))
+    except FileException as e:
+        print(f'Input file: {e.message}', file=sys.stderr)
+        return 2
+
+    wells = []
+    for file in collect_data_files(args.observations):
+        try:
+            with span('load_file', reader='read_observations', path=str(file), cached=False, source='file'):
+                wells.append((file.stem, read_observations(file)))
+        except FileException as e:
+            print(f'Observations file {file}: {e.message}', file=sys.stderr)
+
+    if not wells:
+        print('No observations files', file=sys.stderr)
+        return 2
+
+    results_path = Path(args.output, f'results_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}')
+    if args.archive:
+        Path(args.output).mkdir(parents=True, exist_ok=True)
+    else:
+        results_path.mkdir(parents=True, exist_ok=True)
+
+    tasks = [FitTask(index, input_data, obs, args.alpha, model, args.uncertainty)
+             for index, ((_, obs), model) in enumerate(itertools.product(wells, models))]
+
+    rows = {}
+    results = {}
+    failed = []
+
+    def trace_fields(task) -> dict:
+        return {'well': wells[task.key // len(models)][0], 'model': task.model[0],
+                'model_index': task.key % len(models), 'phase': 'fit'}
+
+    def task_started(task):
+        event('fit.start', **trace_fields(task))
+
+    def task_finished(task, data, stats):
+        name = f'{wells[task.key // len(models)][0]}_{task.key % len(models)}'
+        event('fit.end', cached=stats is None, **trace_fields(task), **(stats._asdict() if stats else {}))
+        texts = result_texts(data[0])
+        if args.archive:
+            results[task.key] = (name, data[0])
+        else:
+            save_result(Path(results_path, name), data[0], texts)
+        rows[task.key] = parameters_row(name, data[0], texts, stats)
+        print(f'[{len(rows) + len(failed)}/{len(tasks)}] {name} {task.model[0]} MSE={data[0].mse}')
+
+    def task_failed(task, error):
+        name = f'{wells[task.key // len(models)][0]}_{task.key % len(models)}'
+        failed.append(name)
+        event('fit.failed', error=repr(error), **trace_fields(task))
+        print(f'[{len(rows) + len(failed)}/{len(tasks)}] {name} {task.model[0]} failed: {error}', file=sys.stderr)
+
+    FitScheduler(args.backend, args.workers, result_cache).run(tasks, task_finished, task_failed, task_started)
+
+    with span('export', kind='archive' if args.archive else 'parameters', results=len(rows)):
+        if args.archive:
+            save_archive(results_path.with_suffix('.npz'), [results[key] for key in sorted(results)])
+        else:
+            save_parameters(Path(results_path, f'parameters_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.csv'),
+                            (rows[key] for key in sorted(rows)))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+r"""
+Startup time of the GUI: import of gui_main and time until the main window is painted first.
+
+Every run starts a new interpreter, so imports are measured cold (apart from the OS file cache). Without display
+set QT_QPA_PLATFORM=offscreen.
+
+Example:
+    python benchmarks/startup.py --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = r'''
+import json
+import sys
+import time
+
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+
+from PyQt5 import QtCore, QtWidgets
+
+import gui_main
+
+imported = time.perf_counter()
+
+app = QtWidgets.QApplication(sys.argv[:1])
+Gui = QtWidgets.QWidget()
+ui = gui_main.MainGui()
+ui.setupUi(Gui)
+ui.setup_controls()
+ui.setup_callbacks()
+
+
+class PaintFilter(QtCore.QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint and obj is Gui:
+            painted = time.perf_counter()
+            print(json.dumps({'import': imported - start, 'first_paint': painted - start,
+                              'modules': len(sys.modules)}))
+            QtCore.QTimer.singleShot(0, app.quit)
+            Gui.removeEventFilter(self)
+
+        return False
+
+
+paint_filter = PaintFilter()
+Gui.installEventFilter(paint_filter)
+Gui.show()
+app.exec_()
+'''
+
+
+def run_once() -> dict:
+    env = dict(os.environ)
+    if not env.get('DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    output = subprocess.run([sys.executable, '-c', CHILD, str(ROOT)], env=env, check=True, stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(runs: int) -> dict:
+    """
+    :param runs: number of started interpreters
+    :return: median and minimum of import and first paint times in seconds
+    """
+    samples = [run_once() for _ in range(runs)]
+    results = {}
+    for name in ('import', 'first_paint'):
+        values = [sample[name] for sample in samples]
+        results[name] = {'median': statistics.median(values), 'min': min(values), 'runs': values}
+    results['modules'] = samples[-1]['modules']
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure startup time of the GUI.')
+    parser.add_argument('--runs', type=int, default=5, help='number of runs')
+    parser.add_argument('--output', help='JSON file for results')
+    args = parser.parse_args(argv)
+
+    results = measure(args.runs)
+    print(f'import: {results["import"]["median"]:.3f} s, first paint: {results["first_paint"]["median"]:.3f} s '
+          f'(median of {args.runs} runs, {results["modules"]} modules loaded)')
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
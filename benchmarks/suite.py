@@ -0,0 +1,314 @@
+r"""
+Benchmarks of fitting, data loading, plotting, results table and export. Runs offscreen, results are saved as JSON,
+which can be compared with results of previous release.
+
+Synthetic data are used: monthly input with bomb peak and yearly observations simulated by EPM. Data files are
+written as csv with year and tritium columns. Outputs of fitted results are also compared with the convolution engine
+(convolution.compare_with_fit), the differences are printed and saved in metadata as 'parity'.
+
+Example:
+    python benchmarks/suite.py --output bench.json
+    python benchmarks/suite.py --output new.json --compare bench.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+if not os.environ.get('DISPLAY'):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+MODELS = {
+    'PFM': ((1, 100),),
+    'EM': ((1, 100),),
+    'EPM': ((1, 100), (1, 3)),
+    'DM': ((1, 100), (0.01, 2)),
+}
+ALPHA = 0.5
+
+
+def summary(samples, **extra) -> dict:
+    """ Median and minimum of samples in seconds. """
+    return dict(median=statistics.median(samples), min=min(samples), samples=samples, **extra)
+
+
+def timings(func, repeat: int, **extra) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    return summary(samples, **extra)
+
+
+def synthetic_input(start: float = 1953.0, stop: float = 2020.0, step: float = 1 / 12):
+    """ Monthly tritium in precipitation with bomb peak in 1963. """
+    x = np.arange(start, stop, step)
+    y = 5 + 2000 * np.exp(-((x - 1963.5) / 2.5) ** 2) + 300 * np.exp(-(x - 1963.5) / 6) * (x > 1963.5)
+
+    return x, y
+
+
+def synthetic_observations(x, y, seed: int = 0):
+    """ Yearly observations of well described by EPM (transit time 20 years, eta 1.5) with noise. """
+    from convolution import simulate
+
+    grid, output = simulate('EPM', [20.0, 1.5], x, y, alpha=ALPHA)
+    years = np.arange(1990.0, 2019.0)
+    values = np.interp(years, grid, output[0]) + np.random.RandomState(seed).normal(0, 0.2, len(years))
+
+    return years, values
+
+
+def write_csv(path: Path, x, y):
+    np.savetxt(path, np.column_stack((x, y)), delimiter=',', header='year,tritium', comments='')
+
+
+def bench_fit(input_data, obs_data, repeat: int, uncertainty: bool) -> tuple:
+    """
+    :return: benchmarks and fitting results of all models
+    """
+    from tracer_method.core.tritium.tritium_method import tritium_method
+
+    results = {}
+    fitted = []
+    for model_type, bounds in MODELS.items():
+        for calculate_uncertainty in ((False, True) if uncertainty else (False,)):
+            def fit():
+                fitted.append(tritium_method(input_data, obs_data, ALPHA, [[model_type, bounds]],
+                                             calculate_uncertainty)[0])
+
+            name = f'fit.{model_type}{".uncertainty" if calculate_uncertainty else ""}'
+            results[name] = timings(fit, repeat)
+
+    return results, fitted
+
+
+def parity(input_data, fitted) -> dict:
+    """ Differences of convolution engine from outputs of fitted results (relative to maximum of output). """
+    from convolution import compare_with_fit
+
+    return {data.model_type: compare_with_fit(data, input_data, ALPHA) for data in fitted if not data.beta}
+
+
+def bench_read(directory: Path, rows: int, repeat: int) -> dict:
+    from data_cache import ParsedDataCache
+    from tracer_method.core.read_data.read_input_file import read_tritium_file
+    from tracer_method.core.read_data.read_observations_file import read_observations
+
+    x = np.linspace(1953.0, 2020.0, rows)
+    input_path = Path(directory, 'input.csv')
+    obs_path = Path(directory, 'observations.csv')
+    write_csv(input_path, x, 5 + np.sin(x))
+    write_csv(obs_path, x, 5 + np.cos(x))
+
+    cache = ParsedDataCache(256 * 2 ** 20)
+    cache.get(input_path, read_tritium_file)
+
+    return {
+        'read.input': timings(lambda: read_tritium_file(input_path), repeat, rows=rows),
+        'read.observations': timings(lambda: read_observations(obs_path), repeat, rows=rows),
+        'read.input.cached': timings(lambda: cache.get(input_path, read_tritium_file), repeat, rows=rows),
+    }
+
+
+class Gui:
+    """ Main window with results, shown offscreen. """
+
+    def __init__(self, fitted, count: int):
+        from PyQt5 import QtWidgets
+
+        import gui_main
+
+        self.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+        self.widget = QtWidgets.QWidget()
+        self.ui = gui_main.MainGui()
+        self.ui.setupUi(self.widget)
+        self.ui.setup_controls()
+        self.ui.setup_callbacks()
+        self.ui.stackedWidget.setCurrentIndex(1)
+        self.widget.resize(1400, 800)
+        self.widget.show()
+
+        for index in range(count):
+            data = fitted[index % len(fitted)]
+            self.ui.get_data((index, 0), f'well_{index}', [data])
+        self.app.processEvents()
+
+    def wait(self, condition):
+        while condition():
+            self.app.processEvents()
+            time.sleep(0.001)
+
+
+def bench_show_plot(gui: Gui, repeat: int) -> dict:
+    ids = gui.ui.results.ids[:50]
+
+    def switch():
+        for result_id in ids:
+            gui.ui.show_plot(result_id)
+            gui.app.processEvents()
+
+    result = timings(switch, repeat)
+    # time of one switch
+    return {'show_plot': summary([sample / len(ids) for sample in result['samples']])}
+
+
+def bench_table(fitted, rows: int, repeat: int) -> dict:
+    from PyQt5 import QtWidgets
+
+    from gui_utils import results_texts
+    from table_main import TableUi
+
+    texts = results_texts(fitted)
+    samples = []
+    for _ in range(repeat):
+        form = QtWidgets.QWidget()
+        table = TableUi()
+        table.setupUi(form)
+        table.setup_table()
+
+        start = time.perf_counter()
+        for index in range(rows):
+            table.update_table(f'well_{index}', fitted[index % len(fitted)], texts[index % len(fitted)])
+        table.flush()
+        samples.append(time.perf_counter() - start)
+
+    return {'table.update_table': summary(samples, rows=rows, rows_per_second=rows / statistics.median(samples))}
+
+
+def bench_export(gui: Gui, directory: Path, repeat: int) -> dict:
+    from PyQt5 import QtWidgets
+
+    count = len(gui.ui.results)
+    gui.ui.results_model.set_all_checked(True)
+    results = {}
+
+    for name, action, dialog, target in (
+            ('export.directories', gui.ui.save_button_clicked, 'getExistingDirectory', lambda run: str(directory)),
+            ('export.archive', gui.ui.save_archive_clicked, 'getSaveFileName',
+             lambda run: (str(Path(directory, f'results_{run}.npz')), ''))):
+        original = getattr(QtWidgets.QFileDialog, dialog)
+        samples = []
+        try:
+            for run in range(repeat):
+                setattr(QtWidgets.QFileDialog, dialog, staticmethod(lambda *args, run=run: target(run)))
+                start = time.perf_counter()
+                action()
+                gui.wait(lambda: gui.ui.export_thread is not None)
+                samples.append(time.perf_counter() - start)
+                # directories are named by time with seconds
+                time.sleep(1)
+        finally:
+            setattr(QtWidgets.QFileDialog, dialog, original)
+
+        results[name] = summary(samples, results=count, results_per_second=count / statistics.median(samples))
+
+    return results
+
+
+def metadata() -> dict:
+    from PyQt5 import QtCore
+
+    import matplotlib
+
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'qt': QtCore.QT_VERSION_STR,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Print ratios of medians to baseline.
+
+    :return: names of benchmarks slower than baseline by more than threshold
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        ratio = result['median'] / baseline[name]['median']
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print(f'{name:32} {baseline[name]["median"]:10.4f} s -> {result["median"]:10.4f} s  x{ratio:.2f}'
+              f'{"  REGRESSION" if regressed else ""}')
+
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Run benchmarks of the GUI hot paths.')
+    parser.add_argument('--output', help='JSON file for results')
+    parser.add_argument('--compare', help='JSON file with results of previous run')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative slowdown against --compare')
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions of every benchmark')
+    parser.add_argument('--no-uncertainty', action='store_true', help='skip fits with uncertainty, they are slow')
+    parser.add_argument('--rows', type=int, default=100000, help='rows of synthetic data files')
+    parser.add_argument('--results', type=int, default=500, help='number of results shown and exported')
+    parser.add_argument('--table-rows', type=int, default=10000, help='rows inserted into results table')
+    parser.add_argument('--startup-runs', type=int, default=3, help='startup measurements, 0 skips them')
+    args = parser.parse_args(argv)
+
+    x, y = synthetic_input()
+    input_data = [list(x), list(y)]
+    obs_data = [list(values) for values in synthetic_observations(x, y)]
+
+    results = {}
+    fit_results, fitted = bench_fit(input_data, obs_data, args.repeat, not args.no_uncertainty)
+    results.update(fit_results)
+    differences = parity(input_data, fitted)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results.update(bench_read(Path(directory), args.rows, args.repeat))
+
+        gui = Gui(fitted, args.results)
+        results.update(bench_show_plot(gui, args.repeat))
+        results.update(bench_table(fitted, args.table_rows, args.repeat))
+        results.update(bench_export(gui, Path(directory), args.repeat))
+
+    if args.startup_runs:
+        from startup import measure
+
+        startup = measure(args.startup_runs)
+        results['startup.import'] = summary(startup['import']['runs'])
+        results['startup.first_paint'] = summary(startup['first_paint']['runs'])
+
+    for name, result in results.items():
+        print(f'{name:32} median {result["median"]:.4f} s, min {result["min"]:.4f} s')
+    for model_type, difference in differences.items():
+        print(f'parity.{model_type:25} {difference:.2e} of maximum output')
+
+    if args.output:
+        meta = dict(metadata(), arguments=vars(args), parity=differences)
+        Path(args.output).write_text(json.dumps({'meta': meta, 'benchmarks': results}, indent=2))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())['benchmarks']
+        if compare(results, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,29 +1,155 @@
+import itertools
+
 from PyQt5 import QtCore
-from tracer_method.core.tritium.tritium_method import tritium_method
+
+import settings
+from executors import FitScheduler
+from executors import FitTask
+from executors import SweepTask
+from memory_profile import memory_profiler
+from progress import ProgressTracker
+from progress import format_eta
+from result_cache import result_cache
+from run_trace import event
 
 
 class ThreadClass(QtCore.QThread):
     notifyProgress = QtCore.pyqtSignal(int)
     notifyProgressLabel = QtCore.pyqtSignal(str)
     notifyCalculationsLabel = QtCore.pyqtSignal(str)
-    finalData = QtCore.pyqtSignal(list)
+    finalData = QtCore.pyqtSignal(object, str, list, object)
+    sweepData = QtCore.pyqtSignal(object, dict)
 
-    def __init__(self, models, input, obs, alpha, calculate_uncertainty, parent=None):
+    def __init__(self, models, input, wells, alpha, calculate_uncertainty, backend=None, workers=None,
+                 sweep=False, durations=None, parent=None):
+        """
+        :param models: models configurations
+        :param input: input data shared by all wells
+        :param wells: list of (name, observations) pairs, every model is fitted to every well
+        :param sweep: evaluate error surface of every model within its bounds and emit it through sweepData, models
+            with beta are not swept
+        :param durations: history of ProgressTracker kept by caller between runs, estimates of the first run are not
+            known without it
+        """
         QtCore.QThread.__init__(self, parent)
         self.models_picked = models
         self.input = input
-        self.obs = obs
+        self.wells = wells
         self.alpha = alpha
         self.calculate_uncertainty = calculate_uncertainty
+        self.sweep = sweep
+        self.scheduler = FitScheduler(backend, workers, result_cache)
+        self.durations = {} if durations is None else durations
+        self.tracker = None
+        self.sweep_tasks = {}
+        self.failed_models = []
 
     def run(self):
         self.notifyCalculationsLabel.emit('Calculations in progress')
 
-        for index, model_picked in enumerate(self.models_picked):
-            data = tritium_method(self.input, self.obs, self.alpha, [model_picked], self.calculate_uncertainty)
-            value = round((index + 1) / len(self.models_picked), 2) * 100
-            self.notifyProgress.emit(value)
-            self.notifyProgressLabel.emit(f'{value}%')
-            self.finalData.emit(data)
+        # key of task is (well index, model index, phase), phase is 'fit' or 'sweep'
+        tasks = []
+        self.sweep_tasks = {}
+        for (well_index, (_, obs)), (model_index, model_picked) in itertools.product(enumerate(self.wells),
+                                                                                     enumerate(self.models_picked)):
+            tasks.append(FitTask((well_index, model_index, 'fit'), self.input, obs, self.alpha, model_picked,
+                                 self.calculate_uncertainty))
+
+            # sweep of model is scheduled when its fit ends, the fitted parameters are evaluated with the grid
+            if self.sweep and len(model_picked) < 3:
+                self.sweep_tasks[(well_index, model_index, 'fit')] = \
+                    SweepTask((well_index, model_index, 'sweep'), self.input, obs, self.alpha, model_picked,
+                              settings.SWEEP_POINTS)
+
+        self.tracker = ProgressTracker(tasks + list(self.sweep_tasks.values()), self.scheduler.workers,
+                                       self.durations)
+        self.failed_models = []
+        event('run.start', wells=len(self.wells), models=[model[0] for model in self.models_picked], tasks=len(tasks),
+              backend=self.scheduler.backend, workers=self.scheduler.workers)
+        with memory_profiler.measure('calculation', wells=len(self.wells), tasks=len(tasks)):
+            self.scheduler.run(tasks, self.task_finished, self.task_failed, self.task_started, self.report_progress)
+        event('run.end', cancelled=self.scheduler.cancelled.is_set(), failed=len(self.failed_models))
+
+        if self.scheduler.cancelled.is_set():
+            self.notifyCalculationsLabel.emit('Calculations cancelled')
+        elif self.failed_models:
+            self.notifyCalculationsLabel.emit(f'Calculations failed for: {", ".join(self.failed_models)}')
+        elif self.sweep and any(len(model) > 2 for model in self.models_picked):
+            self.notifyCalculationsLabel.emit('Error surface is not evaluated for models with beta')
+        else:
+            self.notifyCalculationsLabel.emit('')
+
+    def cancel(self):
+        """ Cancel calculations, results of unfinished models are not emitted. """
+        self.scheduler.cancel()
+
+    def pause(self):
+        """ Pause calculations after models which are currently fitted. """
+        self.scheduler.pause()
+        self.notifyCalculationsLabel.emit('Calculations paused')
+
+    def resume(self):
+        """ Resume paused calculations. """
+        self.scheduler.resume()
+        self.notifyCalculationsLabel.emit('Calculations in progress')
+
+    def task_started(self, task):
+        self.tracker.task_started(task)
+        event('fit.start', **self.trace_fields(task))
+
+    def trace_fields(self, task) -> dict:
+        well_index, model_index, phase = task.key
+        return {'well': self.wells[well_index][0], 'model': task.model[0], 'model_index': model_index, 'phase': phase}
+
+    def task_finished(self, task, data, stats):
+        """ Emit results of finished model with its statistics and update progress. """
+        well_index, model_index, phase = task.key
+        event('fit.end', cached=stats is None, **self.trace_fields(task), **(stats._asdict() if stats else {}))
+        if phase == 'sweep':
+            self.tracker.task_finished(task)
+            self.report_progress(force=True)
+            self.sweepData.emit((well_index, model_index), data)
+            return
+
+        self.tracker.task_finished(task, data[0].mse)
+        self.report_progress(force=True)
+
+        self.finalData.emit((well_index, model_index), self.wells[well_index][0], data, stats)
+
+        if task.key in self.sweep_tasks:
+            self.scheduler.add(self.sweep_tasks[task.key]._replace(fitted=list(data[0].params)))
+
+    def task_failed(self, task, error):
+        """ Report failed model and update progress. """
+        well_index, model_index, phase = task.key
+        event('fit.failed', error=repr(error), **self.trace_fields(task))
+        self.failed_models.append(f'{self.wells[well_index][0]} {task.model[0]}{"" if phase == "fit" else " " + phase}')
+        self.tracker.task_finished(task)
+
+        if task.key in self.sweep_tasks:
+            self.tracker.task_finished(self.sweep_tasks[task.key])
+
+        self.report_progress(force=True)
+
+    def report_progress(self, force: bool = False):
+        """ Emit estimated progress, remaining time and best MSE, at most every tracker's min_interval. """
+        if not self.tracker.due() and not force:
+            return
+
+        fraction, eta = self.tracker.estimate()
+        value = int(fraction * 100)
+        self.notifyProgress.emit(value)
+        if value >= 100:
+            self.notifyProgressLabel.emit('100%')
+        elif eta is None:
+            # durations are not known yet, running fits show that calculations go on
+            running, elapsed = self.tracker.running()
+            self.notifyProgressLabel.emit(f'{value}% ({running} running for {format_eta(elapsed)})' if running else
+                                          f'{value}% (ETA -)')
+        else:
+            self.notifyProgressLabel.emit(f'{value}% (ETA {format_eta(eta)})')
 
-        self.notifyCalculationsLabel.emit('')
+        if self.scheduler.paused.is_set():
+            return
+        if self.tracker.best_mse is not None:
+            self.notifyCalculationsLabel.emit(f'Calculations in progress, best MSE: {self.tracker.best_mse}')
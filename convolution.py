@@ -0,0 +1,173 @@
+"""
+Vectorized evaluation of lumped parameter models.
+
+Output concentration is the convolution of the input with the response function of the model and radioactive decay:
+
+    C_out(t) = integral C_in(t - t') g(t') exp(-lambda t') dt'
+
+Input is weighted by infiltration coefficient alpha (summer half-year), resampled to a uniform time grid, and whole
+batches of parameters are evaluated at once. Engines 'fft' and 'direct' agree within TOLERANCE (relative to the maximum
+of the output).
+
+The engine evaluates models for grid sweeps and benchmarks, fits still run tritium_method of tracer_method, which does
+its own model evaluation inside its solver. compare_with_fit measures the difference of this model from output of a
+fitted result, so the two can be checked against each other.
+"""
+from typing import Tuple
+
+import numpy as np
+
+import settings
+
+ENGINES = ('fft', 'direct')
+
+# tritium half-life is 12.32 years
+TRITIUM_DECAY = np.log(2) / 12.32
+
+TOLERANCE = 1e-9
+
+# fractions of year of the summer half-year (April - September), in which infiltration is reduced by alpha
+SUMMER = (0.25, 0.75)
+
+
+def uniform_grid(x, y) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Resample data series to uniform grid with median time step.
+
+    :param x: time
+    :param y: values
+    :return: grid, values on grid, time step
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    dt = float(np.median(np.diff(x)))
+    grid = x[0] + dt * np.arange(int(round((x[-1] - x[0]) / dt)) + 1)
+
+    return grid, np.interp(grid, x, y), dt
+
+
+def infiltration_weighted(x, y, alpha: float) -> np.ndarray:
+    """
+    Input weighted by infiltration coefficient.
+
+    Summer values are weighted by alpha and winter values by 1, weights are normalized to mean 1 within every calendar
+    year, so yearly input (single value per year) is not changed.
+
+    :param x: time in years
+    :param y: values
+    :param alpha: infiltration coefficient of summer relative to winter
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if alpha == 1:
+        return y
+
+    # times of months (e.g. 1953 + 3 / 12) are not exact
+    x = np.round(x, 6)
+    years = np.floor(x)
+    season = x - years
+    weights = np.where((season >= SUMMER[0]) & (season < SUMMER[1]), alpha, 1.0)
+    _, year_index = np.unique(years, return_inverse=True)
+    year_mean = np.bincount(year_index, weights) / np.bincount(year_index)
+
+    return y * weights / year_mean[year_index]
+
+
+def response_function(model_type: str, params, lags: np.ndarray, dt: float) -> np.ndarray:
+    """
+    Response functions of model for batch of parameters.
+
+    :param model_type: PFM, EM, EPM or DM
+    :param params: array (n, k) of parameters: transit time and eta (EPM) or dispersion parameter (DM)
+    :param lags: lags at which response function is evaluated, shape (m,)
+    :param dt: time step, used for the discrete delta of PFM
+    :return: array (n, m)
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+    t = lags[np.newaxis, :]
+    tau = params[:, :1]
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        if model_type == 'PFM':
+            g = (np.abs(t - tau) < dt / 2) / dt
+        elif model_type == 'EM':
+            g = np.exp(-t / tau) / tau
+        elif model_type == 'EPM':
+            eta = params[:, 1:2]
+            g = np.where(t >= tau * (1 - 1 / eta), eta / tau * np.exp(-eta * t / tau + eta - 1), 0.0)
+        elif model_type == 'DM':
+            pd = params[:, 1:2]
+            g = 1 / np.sqrt(4 * np.pi * pd * t / tau) / t * np.exp(-(1 - t / tau) ** 2 / (4 * pd * t / tau))
+        else:
+            raise ValueError(f'Unknown model type: {model_type}')
+
+    return np.nan_to_num(g, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def convolve(values: np.ndarray, kernels: np.ndarray, engine: str) -> np.ndarray:
+    """
+    Causal convolution of input with batch of kernels, truncated to input length.
+
+    :param values: input on uniform grid, shape (m,)
+    :param kernels: kernels multiplied by time step, shape (n, m)
+    :param engine: 'fft' or 'direct'
+    :return: array (n, m)
+    """
+    size = values.shape[-1]
+
+    if engine == 'fft':
+        n_fft = 1 << int(2 * size - 1).bit_length()
+        spectrum = np.fft.rfft(kernels, n_fft, axis=-1) * np.fft.rfft(values, n_fft)
+        return np.fft.irfft(spectrum, n_fft, axis=-1)[:, :size]
+
+    if engine == 'direct':
+        return np.stack([np.convolve(values, kernel)[:size] for kernel in kernels])
+
+    raise ValueError(f'Unknown convolution engine: {engine}. Use one of: {", ".join(ENGINES)}')
+
+
+def simulate(model_type: str, params, x, y, engine: str = None, decay: float = TRITIUM_DECAY, alpha: float = 1.0):
+    """
+    Output concentration of model for batch of parameters.
+
+    :param model_type: PFM, EM, EPM or DM
+    :param params: parameters (k,) or batch of parameters (n, k)
+    :param x: input time
+    :param y: input concentration
+    :param engine: 'fft' or 'direct', default from settings
+    :param decay: decay constant [1/year]
+    :param alpha: infiltration coefficient, 1 leaves input unchanged
+    :return: grid (m,), output (n, m)
+    """
+    grid, values, dt = uniform_grid(x, infiltration_weighted(x, y, alpha))
+    lags = (np.arange(grid.size) + 0.5) * dt
+    kernels = response_function(model_type, params, lags, dt) * np.exp(-decay * lags) * dt
+
+    return grid, convolve(values, kernels, engine or settings.CONVOLUTION_ENGINE)
+
+
+def compare_engines(model_type: str, params, x, y) -> float:
+    """
+    Maximum difference of engines relative to the maximum of the output, should be below TOLERANCE.
+    """
+    _, fft = simulate(model_type, params, x, y, 'fft')
+    _, direct = simulate(model_type, params, x, y, 'direct')
+
+    return float(np.max(np.abs(fft - direct)) / max(np.max(np.abs(direct)), np.finfo(float).tiny))
+
+
+def compare_with_fit(data, input, alpha: float, engine: str = None) -> float:
+    """
+    Maximum difference of this model from output of fitted result, relative to the maximum of the output.
+
+    :param data: fitting result of tritium_method (output is compared at its times)
+    :param input: input data (time, concentration) of the fit
+    :param alpha: infiltration coefficient of the fit
+    :param engine: 'fft' or 'direct', default from settings
+    """
+    size = 2 if data.model_type in ('EPM', 'DM') else 1
+    grid, output = simulate(data.model_type, list(data.params)[:size], input[0], input[1], engine, alpha=alpha)
+    x, y = (np.asarray(i, dtype=np.float64) for i in data.output)
+    simulated = np.interp(x, grid, output[0])
+
+    return float(np.max(np.abs(simulated - y)) / max(np.max(np.abs(y)), np.finfo(float).tiny))
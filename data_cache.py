@@ -0,0 +1,205 @@
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, Optional, Tuple
+
+import numpy as np
+
+import settings
+from run_trace import span
+
+
+def data_size(data) -> int:
+    """
+    Estimate memory used by parsed data.
+
+    :param data: sequence of data series
+    :return: size in bytes
+    """
+    size = 0
+    for series in data:
+        if hasattr(series, 'nbytes'):
+            size += series.nbytes
+        else:
+            # float object and pointer to it in list
+            size += len(series) * 32
+
+    return size
+
+
+class SidecarCache:
+    """
+    Binary copies of parsed files.
+
+    Every file holds a header with size and modification time of the source file and the data as float64 array,
+    which is memory-mapped on load. Copy is ignored and replaced as soon as the source file changes.
+    """
+    magic = b'TMGCACHE'
+    header = struct.Struct('<8sqqII')
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def path(self, key: Tuple[Hashable, ...]) -> Path:
+        source, _, _, reader = key
+        return Path(self.directory, hashlib.sha1(f'{source}|{reader}'.encode()).hexdigest() + '.f64')
+
+    def load(self, key: Tuple[Hashable, ...]) -> Optional[list]:
+        """
+        Load data of source file if it did not change.
+
+        :param key: cache key of source file
+        :return: list of data series or None if there is no valid copy
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                magic, size, mtime, rows, columns = self.header.unpack(file.read(self.header.size))
+        except (OSError, struct.error):
+            return None
+
+        if magic != self.magic or (size, mtime) != (key[1], key[2]):
+            return None
+
+        array = np.memmap(path, dtype='<f8', mode='r', offset=self.header.size, shape=(rows, columns))
+
+        return list(array)
+
+    def store(self, key: Tuple[Hashable, ...], data):
+        """ Save data of source file, data which is not a rectangular numeric table is skipped. """
+        try:
+            array = np.ascontiguousarray(data, dtype='<f8')
+        except (TypeError, ValueError):
+            return
+
+        if array.ndim != 2:
+            return
+
+        path = self.path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            file = tempfile.NamedTemporaryFile(dir=self.directory, delete=False)
+        except OSError:
+            return
+
+        try:
+            with file:
+                file.write(self.header.pack(self.magic, key[1], key[2], *array.shape))
+                file.write(array.tobytes())
+            os.replace(file.name, path)
+        except OSError:
+            # e.g. full disk, partially written copy is not left in cache directory
+            try:
+                os.remove(file.name)
+            except OSError:
+                pass
+
+
+class ParsedDataCache:
+    """ Parsed data files, keyed by path, size, modification time and reader. Least recently used are evicted. """
+
+    def __init__(self, max_bytes: int, sidecar: Optional[SidecarCache] = None):
+        self.max_bytes = max_bytes
+        self.sidecar = sidecar
+        self.entries: OrderedDict = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(path: Path, reader: Callable) -> Tuple[Hashable, ...]:
+        stat = os.stat(path)
+        return str(path.resolve()), stat.st_size, stat.st_mtime_ns, f'{reader.__module__}.{reader.__qualname__}'
+
+    def get(self, path: Path, reader: Callable):
+        """
+        Get parsed file, read it only if it is not cached or it has changed.
+
+        :param path: file's path
+        :param reader: function parsing file
+        :return: parsed data
+        """
+        return self.lookup(path, reader)[0]
+
+    def lookup(self, path: Path, reader: Callable) -> Tuple[object, str]:
+        """
+        Get parsed file like get and tell where it came from.
+
+        :return: parsed data and its source: 'memory', 'sidecar' or 'file'
+        """
+        path = Path(path)
+        try:
+            key = self.key(path, reader)
+        except OSError:
+            # let reader report missing file
+            return reader(path), 'file'
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0], 'memory'
+
+        source = 'sidecar'
+        data = self.sidecar.load(key) if self.sidecar else None
+        if data is None:
+            source = 'file'
+            data = reader(path)
+            if self.sidecar:
+                self.sidecar.store(key, data)
+
+        self.put(key, data)
+
+        return data, source
+
+    def put(self, key: Tuple[Hashable, ...], data):
+        size = data_size(data)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            # drop older versions of the same file
+            for stale in [i for i in self.entries if i[0] == key[0] and i[-1] == key[-1]]:
+                self.size -= self.entries.pop(stale)[1]
+
+            self.entries[key] = (data, size)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+parsed_data_cache = ParsedDataCache(settings.PARSED_CACHE_SIZE * 1024 ** 2,
+                                    SidecarCache(settings.SIDECAR_CACHE_DIR) if settings.SIDECAR_CACHE else None)
+
+
+def load_input_file(path: Path):
+    """ Read input (tritium) file through cache. """
+    from tracer_method.core.read_data.read_input_file import read_tritium_file
+
+    return traced_load(path, read_tritium_file)
+
+
+def load_observations_file(path: Path):
+    """ Read observations file through cache. """
+    from tracer_method.core.read_data.read_observations_file import read_observations
+
+    return traced_load(path, read_observations)
+
+
+def traced_load(path: Path, reader: Callable):
+    """ Read file through cache, trace of the load tells if it was served from cache. """
+    with span('load_file', reader=reader.__name__, path=str(path)) as traced:
+        data, source = parsed_data_cache.lookup(path, reader)
+        if traced is not None:
+            traced.fields.update(cached=source != 'file', source=source)
+
+    return data
@@ -0,0 +1,86 @@
+from typing import Optional
+
+from PyQt5 import QtCore
+from PyQt5 import QtWidgets
+
+from memory_profile import MemoryProfiler
+
+HEADER = ['Subsystem', 'Operations', 'Max Peak [MB]', 'Retained [MB]', 'Last Operation', 'Last Peak [MB]',
+          'Last Retained [MB]']
+
+
+def megabytes(size: Optional[int]) -> str:
+    return '-' if size is None else f'{size / 1024 ** 2:.2f}'
+
+
+class DiagnosticsPanel(QtWidgets.QWidget):
+    """ Memory of subsystems reported by memory profiler, refreshed while the panel is shown. """
+
+    def __init__(self, profiler: MemoryProfiler, parent=None, interval: int = 1000):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.setWindowTitle('Diagnostics')
+        self.resize(760, 360)
+
+        self.totalLabel = QtWidgets.QLabel(self)
+        self.subsystemsTable = QtWidgets.QTableWidget(0, len(HEADER), self)
+        self.subsystemsTable.setHorizontalHeaderLabels(HEADER)
+        self.subsystemsTable.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.subsystemsTable.verticalHeader().setVisible(False)
+        self.subsystemsTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.subsystemsTable.horizontalHeader().setStretchLastSection(True)
+        self.subsystemsTable.itemSelectionChanged.connect(self.show_top)
+        self.topTextBrowser = QtWidgets.QTextBrowser(self)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.totalLabel)
+        layout.addWidget(self.subsystemsTable)
+        layout.addWidget(QtWidgets.QLabel('Largest retained allocations of last operation:', self))
+        layout.addWidget(self.topTextBrowser)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        """ Show current summary of profiler. """
+        current, peak = self.profiler.traced_memory()
+        self.totalLabel.setText(f'Traced memory: {megabytes(current)} MB, peak: {megabytes(peak)} MB')
+
+        summary = self.profiler.summary()
+        self.subsystemsTable.setRowCount(len(summary))
+        for row, (subsystem, memory) in enumerate(summary.items()):
+            last = memory.last
+            values = [subsystem, str(memory.operations), megabytes(memory.max_peak), megabytes(memory.retained),
+                      last.operation if last else '-', megabytes(last.peak if last else None),
+                      megabytes(last.retained if last else None)]
+            for column, value in enumerate(values):
+                item = self.subsystemsTable.item(row, column)
+                if item is None:
+                    self.subsystemsTable.setItem(row, column, QtWidgets.QTableWidgetItem(value))
+                else:
+                    item.setText(value)
+
+        self.show_top()
+
+    def show_top(self):
+        """ Show largest allocations of last operation of selected (or first) subsystem. """
+        rows = self.subsystemsTable.selectionModel().selectedRows()
+        row = rows[0].row() if rows else 0
+        item = self.subsystemsTable.item(row, 0)
+        memory = self.profiler.summary().get(item.text()) if item is not None else None
+
+        if memory is None or memory.last is None:
+            self.topTextBrowser.setText('')
+            return
+
+        self.topTextBrowser.setText('\n'.join(f'{megabytes(size)} MB  {line}' for line, size in memory.last.top))
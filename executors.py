@@ -0,0 +1,221 @@
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from multiprocessing.pool import ThreadPool
+from typing import Callable, Hashable, Iterable, NamedTuple, Optional
+
+import settings
+from fit_stats import measure
+from result_cache import fit_key
+
+BACKENDS = ('serial', 'thread', 'process')
+
+
+class FitTask(NamedTuple):
+    """ Single model fit scheduled on executor. """
+    key: Hashable
+    input: list
+    obs: list
+    alpha: float
+    model: list
+    calculate_uncertainty: bool
+
+
+class SweepTask(NamedTuple):
+    """ Grid sweep of model parameters within bounds of model configuration, model must not have beta. """
+    key: Hashable
+    input: list
+    obs: list
+    alpha: float
+    model: list
+    points: int
+    fitted: Optional[list] = None
+
+
+def run_task(task):
+    """
+    Run task. Module level function, so it can be pickled by process pool.
+
+    :param task: FitTask or SweepTask
+    :return: list of fitting results of FitTask, dict with MSE and ME grids of SweepTask
+    """
+    if isinstance(task, SweepTask):
+        from sweep import grid_sweep
+
+        if len(task.model) > 2:
+            raise ValueError(f'{task.model[0]} with beta cannot be swept')
+
+        return grid_sweep(task.model[0], task.model[1], task.input, task.obs, task.alpha, task.points,
+                          fitted=task.fitted)
+
+    from tracer_method.core.tritium.tritium_method import tritium_method
+
+    return tritium_method(task.input, task.obs, task.alpha, [task.model], task.calculate_uncertainty)
+
+
+def run_measured_task(task):
+    """
+    Run task and measure its cost in the worker.
+
+    :param task: FitTask or SweepTask
+    :return: result of run_task and FitStats
+    """
+    return measure(run_task, task)
+
+
+class SerialPool:
+    """ Pool with the same interface as multiprocessing pools, which runs tasks in the calling thread. """
+
+    def apply_async(self, func, args=(), callback=None, error_callback=None):
+        try:
+            result = func(*args)
+        except Exception as e:
+            if error_callback:
+                error_callback(e)
+            return
+
+        if callback:
+            callback(result)
+
+    def close(self):
+        pass
+
+    def terminate(self):
+        pass
+
+    def join(self):
+        pass
+
+
+def create_pool(backend: str, workers: int):
+    """
+    Create pool for given backend.
+
+    :param backend: one of BACKENDS
+    :param workers: number of workers
+    :return: pool
+    """
+    if backend == 'serial':
+        return SerialPool()
+    if backend == 'thread':
+        return ThreadPool(workers)
+    if backend == 'process':
+        # spawn does not copy Qt state of the parent process into workers
+        return multiprocessing.get_context('spawn').Pool(workers)
+
+    raise ValueError(f'Unknown executor backend: {backend}. Use one of: {", ".join(BACKENDS)}')
+
+
+class FitScheduler:
+    """ Fan out fit tasks to executor backend and deliver results as they finish. """
+    poll_interval = 0.1
+
+    def __init__(self, backend: Optional[str] = None, workers: Optional[int] = None, cache=None):
+        """
+        :param backend: one of BACKENDS, default from settings
+        :param workers: number of workers, default from settings
+        :param cache: ResultCache, finished fits are stored in it and cached results are delivered without fitting
+        """
+        self.cache = cache
+        self.backend = backend or settings.EXECUTOR_BACKEND
+        if self.backend not in BACKENDS:
+            raise ValueError(f'Unknown executor backend: {self.backend}. Use one of: {", ".join(BACKENDS)}')
+
+        workers = workers or settings.EXECUTOR_WORKERS or os.cpu_count() or 1
+        self.workers = 1 if self.backend == 'serial' else workers
+
+        self.pending = deque()
+        self.cancelled = threading.Event()
+        self.paused = threading.Event()
+
+    def cancel(self):
+        """
+        Drop pending tasks and stop running ones.
+
+        Process workers are killed, results of fits running in threads are discarded.
+        """
+        self.cancelled.set()
+
+    def pause(self):
+        """ Stop starting new tasks, running tasks are finished. """
+        self.paused.set()
+
+    def resume(self):
+        """ Start scheduling pending tasks again. """
+        self.paused.clear()
+
+    def add(self, task: FitTask):
+        """ Schedule another task while run is in progress, e.g. from on_result callback. """
+        self.pending.append(task)
+
+    def run(self, tasks: Iterable[FitTask], on_result: Callable, on_error: Optional[Callable] = None,
+            on_start: Optional[Callable] = None, on_tick: Optional[Callable] = None):
+        """
+        Run all tasks. Callbacks are called in the thread which called run.
+
+        :param tasks: tasks to be run
+        :param on_result: called with (task, results, FitStats) for every finished task, statistics of cached
+            results are None
+        :param on_error: called with (task, exception) for every failed task
+        :param on_start: called with task when it is handed to a worker
+        :param on_tick: called every poll_interval while tasks are running
+        """
+        self.pending = deque(tasks)
+        finished = queue.Queue()
+        keys = {}
+        pool = None
+        running = 0
+
+        try:
+            while (self.pending or running) and not self.cancelled.is_set():
+                while self.pending and running < self.workers and not self.paused.is_set():
+                    if self.cancelled.is_set():
+                        break
+
+                    task = self.pending.popleft()
+
+                    if self.cache is not None and isinstance(task, FitTask):
+                        keys[task.key] = fit_key(task)
+                        cached = self.cache.get(keys[task.key])
+                        if cached is not None:
+                            on_result(task, cached, None)
+                            continue
+
+                    if pool is None:
+                        pool = create_pool(self.backend, self.workers)
+
+                    running += 1
+                    if on_start:
+                        on_start(task)
+                    pool.apply_async(run_measured_task, (task,),
+                                     callback=lambda result, task=task: finished.put((task, result, None)),
+                                     error_callback=lambda error, task=task: finished.put((task, None, error)))
+
+                try:
+                    task, result, error = finished.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    if on_tick:
+                        on_tick()
+                    continue
+
+                running -= 1
+                if self.cancelled.is_set():
+                    break
+
+                if error is not None:
+                    if on_error is None:
+                        raise error
+                    on_error(task, error)
+                else:
+                    result, stats = result
+                    if task.key in keys:
+                        self.cache.put(keys[task.key], result)
+                    on_result(task, result, stats)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                # threads of cancelled tasks cannot be killed, they are left to finish in background
+                if not self.cancelled.is_set():
+                    pool.join()
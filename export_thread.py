@@ -0,0 +1,137 @@
+import threading
+from multiprocessing.pool import ThreadPool
+from pathlib import Path
+
+from PyQt5 import QtCore
+
+import settings
+from archive import save_archive
+from gui_utils import save_result
+from memory_profile import memory_profiler
+from run_trace import span
+from session import save_session
+
+
+class ExportThread(QtCore.QThread):
+    """ Save results to files in worker threads, so GUI stays responsive while many results are written. """
+    notifyProgress = QtCore.pyqtSignal(int)
+    exportFinished = QtCore.pyqtSignal(str)
+
+    def __init__(self, results, directory: Path, workers=None, parent=None):
+        """
+        :param results: list of (name, fitting result, formatted texts or None) tuples
+        :param directory: every result is saved in its own subdirectory of directory
+        :param workers: number of writing threads, default from settings
+        """
+        QtCore.QThread.__init__(self, parent)
+        self.results = results
+        self.directory = directory
+        self.workers = workers or settings.EXPORT_WORKERS
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """ Stop export after files which are currently written. """
+        self.cancelled.set()
+
+    def save(self, result):
+        name, data, texts = result
+        try:
+            save_result(Path(self.directory, name), data, texts)
+        except Exception as e:
+            # any failure is reported with the result, it must not stop the export without exportFinished
+            return name, str(e)
+
+        return name, None
+
+    def run(self):
+        try:
+            with span('export', kind='directories', results=len(self.results), workers=self.workers), \
+                    memory_profiler.measure('export', 'directories', results=len(self.results)):
+                self.export()
+        except Exception as e:
+            self.exportFinished.emit(f'Export failed: {e}')
+
+    def export(self):
+        failed = []
+        done = 0
+        pool = ThreadPool(self.workers)
+        try:
+            for name, error in pool.imap_unordered(self.save, self.results):
+                done += 1
+                if error is not None:
+                    failed.append(name)
+                self.notifyProgress.emit(done)
+
+                if self.cancelled.is_set():
+                    break
+        finally:
+            pool.terminate()
+
+        if self.cancelled.is_set():
+            self.exportFinished.emit(f'Export cancelled, {done - len(failed)} of {len(self.results)} results saved')
+        elif failed:
+            self.exportFinished.emit(f'Export failed for: {", ".join(failed)}')
+        else:
+            self.exportFinished.emit('')
+
+
+class ArchiveExportThread(QtCore.QThread):
+    """ Save results to single archive file in background. """
+    notifyProgress = QtCore.pyqtSignal(int)
+    exportFinished = QtCore.pyqtSignal(str)
+
+    def __init__(self, results, file_path: Path, parent=None):
+        """
+        :param results: list of (name, fitting result) pairs
+        :param file_path: path of .npz archive
+        """
+        QtCore.QThread.__init__(self, parent)
+        self.results = results
+        self.file_path = file_path
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """ Stop export, archive is not written. """
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            with span('export', kind='archive', results=len(self.results)), \
+                    memory_profiler.measure('export', 'archive', results=len(self.results)):
+                written = save_archive(self.file_path, self.results, self.notifyProgress.emit, self.cancelled)
+        except Exception as e:
+            self.exportFinished.emit(f'Export failed: {e}')
+            return
+
+        self.exportFinished.emit('' if written else 'Export cancelled, archive was not saved')
+
+
+class SessionExportThread(QtCore.QThread):
+    """ Save session file in background. """
+    notifyProgress = QtCore.pyqtSignal(int)
+    exportFinished = QtCore.pyqtSignal(str)
+
+    def __init__(self, entries, file_path: Path, parent=None):
+        """
+        :param entries: list of SessionEntry
+        :param file_path: path of session file
+        """
+        QtCore.QThread.__init__(self, parent)
+        self.entries = entries
+        self.file_path = file_path
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """ Stop saving, session file is not written. """
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            with span('export', kind='session', results=len(self.entries)), \
+                    memory_profiler.measure('export', 'session', results=len(self.entries)):
+                written = save_session(self.file_path, self.entries, self.notifyProgress.emit, self.cancelled)
+        except Exception as e:
+            self.exportFinished.emit(f'Saving session failed: {e}')
+            return
+
+        self.exportFinished.emit('' if written else 'Saving cancelled, session was not saved')
@@ -0,0 +1,61 @@
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+STATS_HEADER = ['Wall Time [s]', 'CPU Time [s]']
+
+
+class FitStats(NamedTuple):
+    """
+    Cost of single fit in seconds, fields which are not known are None.
+
+    tritium_method does not report numbers of function evaluations or iterations of its solver, so only times are
+    measured. Time of a fit with uncertainty includes calculation of confidence intervals.
+    """
+    wall_time: Optional[float] = None
+    cpu_time: Optional[float] = None
+
+
+def measure(func: Callable, *args) -> Tuple[object, FitStats]:
+    """
+    Call function and measure its cost.
+
+    CPU time is measured for the calling thread, so fits running in parallel threads are not counted together.
+
+    :return: result of function and its statistics
+    """
+    start, cpu_start = time.perf_counter(), time.thread_time()
+    result = func(*args)
+    wall_time, cpu_time = time.perf_counter() - start, time.thread_time() - cpu_start
+
+    return result, FitStats(wall_time, cpu_time)
+
+
+def stats_values(stats: Optional[FitStats]) -> List[float]:
+    """ Statistics as floats, unknown values are NaN. """
+    return [float('nan') if value is None else value for value in (stats or FitStats())]
+
+
+def stats_from_values(values) -> Optional[FitStats]:
+    """ Inverse of stats_values, None if no value is known. """
+    values = [None if value != value else float(value) for value in values]
+
+    return None if all(value is None for value in values) else FitStats(*values)
+
+
+def format_stat(name: str, value) -> str:
+    """
+    :param name: field of FitStats
+    :param value: value of field, None or NaN if it is not known
+    :return: text shown in table and csv
+    """
+    if value is None or value != value:
+        return '-'
+
+    return f'{value:.3f}'
+
+
+def stats_row(stats: Optional[FitStats]) -> List[str]:
+    """ Formatted statistics matching STATS_HEADER. """
+    stats = stats or FitStats()
+
+    return [format_stat(name, value) for name, value in zip(FitStats._fields, stats)]
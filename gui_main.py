@@ -1,23 +1,35 @@
 import functools
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
+import numpy as np
 from PyQt5 import QtWidgets, QtCore
-from matplotlib.backends.backend_qt4agg import NavigationToolbar2QT as NavigationToolbar
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 from tracer_method.core.exceptions import FileException
-from tracer_method.core.read_data.read_input_file import read_tritium_file
-from tracer_method.core.read_data.read_observations_file import read_observations
 
+from archive import progress_steps
 from base.gui_base import Ui_Gui
 from calculations_thread import ThreadClass
-from gui_utils import round_sig
-from gui_utils import save_to_csv
+from data_cache import load_input_file
+from data_cache import load_observations_file
+from export_thread import ArchiveExportThread
+from export_thread import ExportThread
+from export_thread import SessionExportThread
+from gui_utils import MODELS_PARAMS
+from gui_utils import collect_data_files
 from input_data_plot import Ui_InputPlot
+from memory_profile import memory_profiler
 from output_data_plot import Ui_OutputPlot
+from results_registry import ResultRegistry
+from results_registry import ResultsListModel
+from run_trace import enabled as trace_enabled
+from run_trace import event as trace_event
+from run_trace import span
+from session import FitConfig
+from session import SessionEntry
+from session import load_session
 from table_main import TableUi
 
 
@@ -26,31 +38,67 @@ class MainGui(Ui_Gui):
         super(MainGui, self).__init__()
         self.input_file: str = ''
         self.observations_file: str = ''
+        self.observations_files: List[str] = []
 
         self.input_data: List = []
         self.obs_data: List = []
+        self.wells: List[Tuple[str, List]] = []
 
-        self.index = 0
         self.calculate_uncertainty = False
         self.models_list = ['PFM', 'EM', 'EPM', 'DM']
 
         self.model_checked: Dict[str, dict] = {name: False for name in self.models_list}
         self.beta_checked: Dict[str, dict] = {name: False for name in self.models_list}
 
-        self.params: Dict[str, List[str]] = {
-            'PFM': {'display': ['\u03C4'], 'csv': ['T']},
-            'EM': {'display': ['\u03C4'], 'csv': ['T']},
-            'EPM': {'display': ['\u03C4', '\u03B7'], 'csv': ['T', 'n']},
-            'DM': {'display': ['\u03C4', 'PD'], 'csv': ['T', 'PD']}
-        }
-
-        self.fig_dict = {}
+        self.params = MODELS_PARAMS
+
+        self.results = ResultRegistry()
+        self.results_model = ResultsListModel(self.results)
+        self.thread = None
+        self.export_thread = None
+        self.cancelled_threads = []
+        # durations of finished fits, estimate progress of later runs
+        self.fit_durations = {}
+        self.sweep = False
+        self.sweeps = {}
+        self.sweeps_pending = {}
+        self.run_results = {}
+        self.run_config = None
         self.canvas_created = False
+        self.canvas_sweep_created = False
+        self.axes = None
+        self.observations_line = None
+        self.output_line = None
+        self.plot_background = None
+        self.plot_requested = None
+        self.updating_limits = False
         self.canvas_input_created = False
         self.canvas_observations_created = False
 
-        self.setup_table()
-        self.setup_data_plots()
+        # forms are created when they are shown or used first, so the main window appears sooner
+        self.table_form = None
+        self.table_ui = None
+        self.input_data_form = None
+        self.output_data_form = None
+        self.diagnostics_panel = None
+
+    @property
+    def table(self) -> TableUi:
+        """ Table of results, its form is created when it is used first. """
+        if self.table_ui is None:
+            self.setup_table()
+
+        return self.table_ui
+
+    @staticmethod
+    def create_canvas():
+        """ Create figure and its Qt canvas, matplotlib is imported when the first plot is created. """
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
+        figure = Figure(figsize=(3, 2), dpi=100)
+
+        return figure, FigureCanvas(figure)
 
     def setup_data_plots(self):
         self.input_data_form = QtWidgets.QWidget()
@@ -63,17 +111,64 @@ class MainGui(Ui_Gui):
 
     def setup_table(self):
         self.table_form = QtWidgets.QWidget()
-        self.table = TableUi()
-        self.table.setupUi(self.table_form)
-        self.table.setup_table()
-        self.table.setup_callbacks()
+        self.table_ui = TableUi()
+        self.table_ui.setupUi(self.table_form)
+        self.table_ui.setup_table()
+        self.table_ui.setup_callbacks()
+
+    def setup_controls(self):
+        """ Add controls which are not part of the designer form. """
+        self.plotListView.setModel(self.results_model)
+
+        self.pauseButton = QtWidgets.QPushButton('Pause', self.page)
+        self.pauseButton.setMinimumSize(QtCore.QSize(100, 30))
+        self.pauseButton.setEnabled(False)
+        self.horizontalLayout_51.insertWidget(1, self.pauseButton)
+
+        self.cancelButton = QtWidgets.QPushButton('Cancel', self.page)
+        self.cancelButton.setMinimumSize(QtCore.QSize(100, 30))
+        self.cancelButton.setEnabled(False)
+        self.horizontalLayout_51.insertWidget(2, self.cancelButton)
+
+        self.sweepCheckBox = QtWidgets.QCheckBox('Error surface (grid sweep)', self.page)
+        self.horizontalLayout_14.insertWidget(3, self.sweepCheckBox)
+
+        self.batchButton = QtWidgets.QToolButton(self.inputFileFrame)
+        self.batchButton.setText('Batch')
+        self.batchButton.setMinimumSize(QtCore.QSize(0, 22))
+        self.batchButton.setPopupMode(QtWidgets.QToolButton.InstantPopup)
+        batch_menu = QtWidgets.QMenu(self.batchButton)
+        self.batchFilesAction = batch_menu.addAction('Observations files...')
+        self.batchDirectoryAction = batch_menu.addAction('Observations directory...')
+        self.batchButton.setMenu(batch_menu)
+        self.horizontalLayout_2.addWidget(self.batchButton)
+
+        save_menu = QtWidgets.QMenu(self.savePushButton)
+        self.saveDirectoriesAction = save_menu.addAction('Directory per result...')
+        self.saveArchiveAction = save_menu.addAction('Single archive (.npz)...')
+        self.savePushButton.setMenu(save_menu)
+
+        self.diagnosticsButton = QtWidgets.QPushButton('Diagnostics', self.page)
+        self.diagnosticsButton.setMinimumSize(QtCore.QSize(120, 30))
+        self.diagnosticsButton.setVisible(memory_profiler.enabled)
+        self.horizontalLayout_27.insertWidget(1, self.diagnosticsButton)
+
+        self.sessionButton = QtWidgets.QToolButton(self.page)
+        self.sessionButton.setText('Session')
+        self.sessionButton.setMinimumSize(QtCore.QSize(120, 30))
+        self.sessionButton.setPopupMode(QtWidgets.QToolButton.InstantPopup)
+        session_menu = QtWidgets.QMenu(self.sessionButton)
+        self.saveSessionAction = session_menu.addAction('Save session...')
+        self.loadSessionAction = session_menu.addAction('Load session...')
+        self.sessionButton.setMenu(session_menu)
+        self.horizontalLayout_27.insertWidget(1, self.sessionButton)
 
     def input_file_button_clicked(self):
         """ Get input file name. """
         self.input_file = QtWidgets.QFileDialog.getOpenFileName(None, "Open ", '.', "(*.xlsx *.xls *.csv)")[0]
 
         try:
-            self.input_data = read_tritium_file(Path(self.input_file))
+            self.input_data = load_input_file(Path(self.input_file))
         except FileException as e:
             QtWidgets.QMessageBox.warning(None, 'Error', f'{e.message}. Correct input file!')
             return
@@ -88,19 +183,64 @@ class MainGui(Ui_Gui):
         self.observations_file = QtWidgets.QFileDialog.getOpenFileName(None, "Open ", '.', "(*.xlsx *.xls *.csv)")[0]
 
         try:
-            self.obs_data = read_observations(Path(self.observations_file))
+            self.obs_data = load_observations_file(Path(self.observations_file))
         except FileException as e:
             QtWidgets.QMessageBox.warning(None, 'Error', f'{e.message}. Select observations file!')
             return
 
+        self.observations_files = [self.observations_file]
+        self.wells = [(Path(self.observations_file).stem, self.obs_data)]
+
         if self.observations_file:
             self.outputFileEdit.setText(self.observations_file)
 
         self.showObservationsDataButton.setEnabled(True)
 
+    def batch_files_clicked(self):
+        """ Get observations files of many wells. """
+        files = QtWidgets.QFileDialog.getOpenFileNames(None, "Open ", '.', "(*.xlsx *.xls *.csv)")[0]
+        self.set_batch_observations(files)
+
+    def batch_directory_clicked(self):
+        """ Get directory with observations files of many wells. """
+        directory = QtWidgets.QFileDialog.getExistingDirectory(None, "Select Directory")
+        if directory:
+            self.set_batch_observations([directory])
+
+    def set_batch_observations(self, paths: List[str]):
+        """ Read observations of all wells, which will be fitted against the same input. """
+        files = collect_data_files(paths)
+        if not files:
+            return
+
+        wells = []
+        observations_files = []
+        errors = []
+        for file in files:
+            try:
+                wells.append((file.stem, load_observations_file(file)))
+                observations_files.append(str(file))
+            except FileException as e:
+                errors.append(f'{file.name}: {e.message}')
+
+        if errors:
+            QtWidgets.QMessageBox.warning(None, 'Error', 'Skipped observations files:\n' + '\n'.join(errors))
+
+        if not wells:
+            return
+
+        self.observations_files = observations_files
+        self.observations_file = self.observations_files[0]
+        self.obs_data = wells[0][1]
+        self.wells = wells
+
+        self.outputFileEdit.setText(f'{len(wells)} wells: {", ".join(name for name, _ in wells)}')
+        self.showObservationsDataButton.setEnabled(True)
+
     def start_button_clicked(self):
         """ Start program. """
-        warnings = self.check_configuration()
+        with span('check_configuration'):
+            warnings = self.check_configuration()
 
         if warnings:
             QtWidgets.QMessageBox.warning(None, 'Error', warnings)
@@ -110,92 +250,292 @@ class MainGui(Ui_Gui):
         alpha = float(self.alphaDoubleSpinBox.text())
         models_picked = self.get_models_configs()
 
+        self.stop_calculations()
+
         self.progressBar.setValue(0)
         self.progressBarLabel.setText('0%')
-        self.startProgressBar(models_picked, self.input_data, self.obs_data, alpha, self.calculate_uncertainty)
+        self.run_config = (models_picked, alpha, self.input_file, list(self.observations_files))
+        self.startProgressBar(models_picked, self.input_data, self.wells, alpha, self.calculate_uncertainty)
 
-    def get_data(self, data):
+    def create_results_canvas(self):
+        """ Create canvas of results plot, if it was not created yet. """
         if not self.canvas_created:
-            self.figure = Figure(figsize=(3, 2), dpi=100)
-            self.canvas = FigureCanvas(self.figure)
+            self.figure, self.canvas = self.create_canvas()
             self.canvas.setMinimumSize(self.canvas.size())
             self.plotWidgetLayout.addWidget(self.canvas)
             self.canvas.draw()
+            self.canvas.mpl_connect('resize_event', self.invalidate_plot_background)
+            self.canvas.mpl_connect('draw_event', self.plot_drawn)
             self.canvas_created = True
 
-        name = Path(self.observations_file).stem
-        self.add_figure(f'{name}', self.figure, data[0], self.index)
+    def get_data(self, key, name, data, stats=None):
+        self.create_results_canvas()
+
+        config = None
+        if self.run_config is not None:
+            models, alpha, input_file, observations_files = self.run_config
+            well_index, model_index = key
+            config = FitConfig(models[model_index], alpha, input_file, observations_files[well_index])
+
+        result_id = self.add_result(f'{name}', data[0], stats, config)
+
+        self.run_results[key] = result_id
+        if key in self.sweeps_pending:
+            self.sweeps[result_id] = self.sweeps_pending.pop(key)
 
         self.checkButton.setEnabled(True)
         self.ModelsPushButton.setEnabled(True)
 
-    def startProgressBar(self, models, input, obs, alpha, calculate_uncertainty):
-        self.thread = ThreadClass(models, input, obs, alpha, calculate_uncertainty)
+    def get_sweep(self, key, sweep):
+        """ Store error surface of result, show it if result is selected. """
+        result_id = self.run_results.get(key)
+        if result_id is None:
+            self.sweeps_pending[key] = sweep
+            return
+
+        self.sweeps[result_id] = sweep
+        if self.current_result_id() == result_id:
+            self.show_sweep(result_id)
+
+    def current_result_id(self):
+        """ Id of result selected in results list. """
+        return self.results_model.result_id(self.plotListView.currentIndex())
+
+    def show_sweep(self, result_id):
+        """ Show error surface of result next to its plot, hide it if result has none. """
+        sweep = self.sweeps.get(result_id)
+        if sweep is None:
+            if self.canvas_sweep_created:
+                self.canvas_sweep.hide()
+            return
+
+        if not self.canvas_sweep_created:
+            self.figure_sweep, self.canvas_sweep = self.create_canvas()
+            self.canvas_sweep.setMinimumSize(QtCore.QSize(300, 300))
+            self.gridLayout.removeWidget(self.plotListView)
+            self.gridLayout.addWidget(self.canvas_sweep, 0, 1, 1, 1)
+            self.gridLayout.addWidget(self.plotListView, 0, 2, 1, 1)
+            self.canvas_sweep_created = True
+
+        self.figure_sweep.clf()
+        axes = self.figure_sweep.add_subplot(111)
+        names = self.params[sweep['model_type']]['display']
+
+        if len(sweep['axes']) == 1:
+            axes.plot(sweep['axes'][0], sweep['mse'], color='blue')
+            axes.plot(sweep['fitted'][0], sweep['fitted_mse'], 'x', color='red')
+            axes.set_xlabel(names[0])
+            axes.set_ylabel('MSE')
+            axes.set_yscale('log')
+        else:
+            x, y = sweep['axes']
+            image = axes.imshow(np.log10(sweep['mse'].T), origin='lower', aspect='auto',
+                                extent=(x[0], x[-1], y[0], y[-1]), cmap='viridis')
+            axes.plot(sweep['fitted'][0], sweep['fitted'][1], 'x', color='red')
+            axes.set_xlabel(names[0])
+            axes.set_ylabel(names[1])
+            self.figure_sweep.colorbar(image, ax=axes, label='log10 MSE')
+
+        # MSE of fitted parameters is evaluated by the engine of the sweep, it can differ from MSE of tritium_method
+        axes.set_title(f'{sweep["model_type"]}: min MSE = {np.nanmin(sweep["mse"]):.4g}, '
+                       f'fitted MSE = {sweep["fitted_mse"]:.4g}, max ME = {np.nanmax(sweep["me"]):.3f}', fontsize=9)
+        self.figure_sweep.tight_layout()
+        self.canvas_sweep.draw()
+        self.canvas_sweep.show()
+
+    def startProgressBar(self, models, input, wells, alpha, calculate_uncertainty):
+        # keys of results are unique only within single run
+        self.sweeps_pending = {}
+        self.run_results = {}
+
+        self.thread = ThreadClass(models, input, wells, alpha, calculate_uncertainty,
+                                  sweep=self.sweepCheckBox.isChecked(), durations=self.fit_durations)
         self.thread.notifyProgress.connect(self.progressBar.setValue)
         self.thread.notifyProgressLabel.connect(self.progressBarLabel.setText)
         self.thread.finalData.connect(self.get_data)
+        self.thread.sweepData.connect(self.get_sweep)
         self.thread.notifyCalculationsLabel.connect(self.calculationsLabel.setText)
+        self.thread.finished.connect(self.calculations_finished)
         self.thread.start()
 
+        self.pauseButton.setText('Pause')
+        self.pauseButton.setEnabled(True)
+        self.cancelButton.setEnabled(True)
+
+    def release_thread(self, thread: ThreadClass):
+        """ Drop reference of cancelled thread which has finished. """
+        if thread in self.cancelled_threads:
+            self.cancelled_threads.remove(thread)
+
+    def stop_calculations(self, wait: bool = False):
+        """ Cancel running calculations and ignore results which are still on their way. """
+        thread, self.thread = self.thread, None
+        if thread is None or thread.isFinished():
+            return
+
+        for signal in (thread.finalData, thread.sweepData, thread.notifyProgress,
+                       thread.notifyProgressLabel, thread.notifyCalculationsLabel, thread.finished):
+            signal.disconnect()
+
+        # keep reference until the thread stops, destroying running QThread aborts the application; connect before
+        # checking isFinished, so the thread finishing in between is not kept forever
+        self.cancelled_threads.append(thread)
+        thread.finished.connect(functools.partial(self.release_thread, thread))
+        if thread.isFinished():
+            self.release_thread(thread)
+            return
+
+        thread.cancel()
+
+        if wait:
+            thread.wait()
+
+    def calculations_finished(self):
+        self.pauseButton.setEnabled(False)
+        self.cancelButton.setEnabled(False)
+
+    def pause_button_clicked(self):
+        """ Pause or resume calculations. """
+        if self.thread is None:
+            return
+
+        if self.pauseButton.text() == 'Pause':
+            self.pauseButton.setText('Resume')
+            self.thread.pause()
+        else:
+            self.pauseButton.setText('Pause')
+            self.thread.resume()
+
+    def cancel_button_clicked(self):
+        """ Cancel calculations. """
+        if self.thread is None:
+            return
+
+        self.thread.cancel()
+        self.pauseButton.setEnabled(False)
+        self.cancelButton.setEnabled(False)
+
     def close_button_clicked(self):
         ret = QtWidgets.QMessageBox.question(None, 'Close request', 'Are you sure you want to quit?',
                                              QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
                                              QtWidgets.QMessageBox.Yes)
         if ret == QtWidgets.QMessageBox.Yes:
+            self.stop_calculations(wait=True)
+            if self.export_thread is not None:
+                self.export_thread.cancel()
+                self.export_thread.wait()
             sys.exit()
         else:
             pass
 
     def save_button_clicked(self):
         """ Save output and response function of all checked results in directory with timestamp. """
+        if self.export_thread is not None:
+            return
+
         directory = QtWidgets.QFileDialog.getExistingDirectory(None, "Select Directory")
+        if not directory:
+            return
 
         results_name = f'results_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}'
         Path(Path(directory, results_name)).mkdir(parents=True, exist_ok=True)
 
-        for i in range(self.plotListWidget.count()):
-            if self.plotListWidget.item(i).checkState() == QtCore.Qt.Checked:
-                name = self.plotListWidget.item(i).text()
-                elem = self.fig_dict[name]
+        results = [(self.results[result_id].name, self.results[result_id].data, self.results[result_id].texts)
+                   for result_id in self.results.checked_ids()]
+        self.start_export(ExportThread(results, Path(directory, results_name)), len(results))
 
-                data = elem[1]
-                model_type = data.model_type
+    def save_archive_clicked(self):
+        """ Save all checked results to single .npz archive. """
+        if self.export_thread is not None:
+            return
 
-                if data.confidence_interval:
-                    params = [f'{i}={j} {round_sig(k)}'
-                              for i, j, k in zip(self.params[model_type]['csv'], data.params, data.confidence_interval)]
-                else:
-                    params = [f'{i}={j} (-)' for i, j in zip(self.params[model_type]['csv'], data.params)]
+        file_path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            None, 'Save archive', f'results_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.npz', 'Archive (*.npz)')
+        if not file_path:
+            return
 
-                beta = data.beta
-                x_o, y_o = data.output
+        results = [(self.results[result_id].name, self.results[result_id].data)
+                   for result_id in self.results.checked_ids()]
+        self.start_export(ArchiveExportThread(results, Path(file_path)), progress_steps(len(results)))
 
-                model_data = [model_type] + params
-                if beta:
-                    model_data.append(f'beta={beta}')
+    def save_session_clicked(self):
+        """ Save all results with their configurations to session file. """
+        if self.export_thread is not None:
+            return
 
-                path = Path(directory, results_name, name.split(' ')[-1])
-                Path(path).mkdir(parents=True, exist_ok=True)
+        file_path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            None, 'Save session', f'session_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.tms', 'Session (*.tms)')
+        if not file_path:
+            return
+
+        entries = []
+        for result_id in self.results.ids:
+            entry = self.results[result_id]
+            entries.append(SessionEntry(entry.name, entry.data, entry.stats, entry.config,
+                                        result_id in self.results.checked))
+        self.start_export(SessionExportThread(entries, Path(file_path)), len(entries))
+
+    def load_session_clicked(self):
+        """ Add results of session file to results list, their curves are read when they are plotted. """
+        file_path, _ = QtWidgets.QFileDialog.getOpenFileName(None, 'Load session', '.', 'Session (*.tms)')
+        if not file_path:
+            return
 
-                save_to_csv(Path(path, 'output.csv'), model_data, x_o, y_o)
+        try:
+            with span('load_session', path=file_path):
+                entries, changed = load_session(Path(file_path))
+        except (OSError, ValueError, KeyError) as e:
+            QtWidgets.QMessageBox.warning(None, 'Error', f'Session cannot be loaded: {e}')
+            return
+
+        if not entries:
+            return
 
-                if not model_type == 'PFM':
-                    x_rf, y_rf = data.response_function
-                    save_to_csv(Path(path, 'response_function.csv'), model_data, x_rf, y_rf)
+        self.create_results_canvas()
+        for result_id in self.results_model.extend(entries):
+            entry = self.results[result_id]
+            self.table.update_table(entry.name, entry.data, entry.texts, entry.stats)
+
+        self.checkButton.setEnabled(True)
+        self.ModelsPushButton.setEnabled(True)
+        self.item_selected()
+
+        if changed:
+            QtWidgets.QMessageBox.warning(None, 'Session', 'Source files changed or are missing since the session was '
+                                                           'saved:\n' + '\n'.join(changed))
+
+    def start_export(self, thread, count: int):
+        """ Run export in background with progress dialog, which cancels it. """
+        self.export_thread = thread
+        self.export_progress = QtWidgets.QProgressDialog('Saving results...', 'Cancel', 0, count)
+        self.export_progress.setWindowTitle('Export')
+        self.export_progress.setMinimumDuration(500)
+        self.export_progress.canceled.connect(thread.cancel)
+
+        thread.notifyProgress.connect(self.export_progress.setValue)
+        thread.exportFinished.connect(self.export_finished)
+        self.savePushButton.setEnabled(False)
+        thread.start()
+
+    def export_finished(self, message: str):
+        self.export_progress.reset()
+        self.export_thread.wait()
+        self.export_thread = None
+        self.savePushButton.setEnabled(bool(self.results.checked))
+        if message:
+            QtWidgets.QMessageBox.warning(None, 'Export', message)
 
     def check_button_clicked(self):
         """ Check/Uncheck all results."""
         if self.checkButton.text() == 'Check all':
             self.checkButton.setText('Uncheck')
 
-            for index in range(self.plotListWidget.count()):
-                self.plotListWidget.item(index).setCheckState(QtCore.Qt.Checked)
+            self.results_model.set_all_checked(True)
 
         else:
             self.checkButton.setText('Check all')
 
-            for index in range(self.plotListWidget.count()):
-                self.plotListWidget.item(index).setCheckState(QtCore.Qt.Unchecked)
+            self.results_model.set_all_checked(False)
 
     def delete_button_clicked(self):
         """ Delete selected results from list. """
@@ -203,23 +543,16 @@ class MainGui(Ui_Gui):
                                              QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
                                              QtWidgets.QMessageBox.Yes)
         if ret == QtWidgets.QMessageBox.Yes:
-            checked_items = sorted([i for i in range(self.plotListWidget.count()) if
-                                    self.plotListWidget.item(i).checkState() == QtCore.Qt.Checked], reverse=True)
-            for i in checked_items:
-                text = self.plotListWidget.item(i).text()
-                del self.fig_dict[text]
-                self.index -= 1
-                self.plotListWidget.takeItem(i)
-                self.table.tableWidget.removeRow(i)
-                for j in range(i, self.plotListWidget.count()):
-                    text = self.plotListWidget.item(j).text()
-                    num = int(text.split('.')[0])
-                    rest = text.split('.')[1]
-                    self.plotListWidget.item(j).setText(f'{num - 1}.{rest}')
-                    self.fig_dict[f'{num - 1}.{rest}'] = self.fig_dict.pop(text)
-                    self.plotListWidget.item(i)
-
-            if not self.plotListWidget.count():
+            checked_ids = self.results.checked_ids()
+            current_id = self.current_result_id()
+            for result_id in checked_ids:
+                self.sweeps.pop(result_id, None)
+            self.table.remove_rows(self.results_model.remove(checked_ids))
+
+            if current_id in self.results:
+                self.plotListView.setCurrentIndex(self.results_model.index(self.results.row(current_id)))
+
+            if not len(self.results):
                 self.checkButton.setText('Check all')
                 self.checkButton.setEnabled(False)
                 self.savePushButton.setEnabled(False)
@@ -229,13 +562,9 @@ class MainGui(Ui_Gui):
                 self.paramsTextBrowser.setText(' ')
                 self.modelTextBrowser.setText(' ')
                 self.mseTextBrowser.setText(' ')
-                self.figure.clf()
-                self.canvas.draw()
-
-            checked_items = [i for i in range(self.plotListWidget.count()) if
-                             self.plotListWidget.item(i).checkState() == QtCore.Qt.Checked]
+                self.clear_plot()
 
-            if not checked_items:
+            if not self.results.checked:
                 self.checkButton.setText('Check all')
                 self.savePushButton.setEnabled(False)
                 self.deleteButton.setEnabled(False)
@@ -268,27 +597,46 @@ class MainGui(Ui_Gui):
         self.progressBar.setValue(0)
         self.stackedWidget.setCurrentIndex(0)
 
+    def diagnostics_button_clicked(self):
+        """ Show memory of subsystems measured by memory profiler. """
+        if self.diagnostics_panel is None:
+            from diagnostics import DiagnosticsPanel
+
+            self.diagnostics_panel = DiagnosticsPanel(memory_profiler)
+
+        self.diagnostics_panel.show()
+        self.diagnostics_panel.raise_()
+
     def plots_button_clicked(self):
         """ Change page to plots. """
         self.stackedWidget.setCurrentIndex(1)
 
     def table_button_clicked(self):
         """ Show table with models data. """
+        if self.table_form is None:
+            self.setup_table()
+
         self.table_form.show()
 
     def check_input_file(self):
         try:
-            read_tritium_file(Path(self.input_file))
+            self.input_data = load_input_file(Path(self.input_file))
         except FileException as e:
             return e.message
 
         return ''
 
     def check_observations_file(self):
-        try:
-            read_observations(Path(self.observations_file))
-        except FileException as e:
-            return e.message
+        wells = []
+        for observations_file in self.observations_files:
+            try:
+                wells.append((Path(observations_file).stem, load_observations_file(Path(observations_file))))
+            except FileException as e:
+                return f'{Path(observations_file).name}: {e.message}' if len(self.observations_files) > 1 else e.message
+
+        # calculations use data which was validated, files could have changed since they were selected
+        self.wells = wells
+        self.obs_data = wells[0][1]
 
         return ''
 
@@ -305,7 +653,7 @@ class MainGui(Ui_Gui):
         else:
             input_file = self.check_input_file()
 
-        if not self.input_file:
+        if not self.observations_files:
             files.append('observations file')
         else:
             obs_file = self.check_observations_file()
@@ -327,10 +675,19 @@ class MainGui(Ui_Gui):
         return ''
 
     def input_data_show_clicked(self):
+        """ Show plot of input data. """
+        with memory_profiler.measure('plot', 'input data'):
+            self.plot_input_data()
+
+    def plot_input_data(self):
         """ Show table with models data. """
+        if self.input_data_form is None:
+            self.setup_data_plots()
+
         if not self.canvas_input_created:
-            self.figure_input = Figure(figsize=(3, 2), dpi=100)
-            self.canvas_input = FigureCanvas(self.figure_input)
+            from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+
+            self.figure_input, self.canvas_input = self.create_canvas()
             self.canvas_input.setMinimumSize(self.canvas_input.size())
             self.toolbar = NavigationToolbar(self.canvas_input, None)
             self.input_data_plot.plotWidgetLayout.addWidget(self.canvas_input)
@@ -338,19 +695,30 @@ class MainGui(Ui_Gui):
             self.canvas_input.draw()
             self.canvas_input_created = True
 
-        self.axes = self.figure_input.add_subplot(111)
+        self.figure_input.clf()
+        axes = self.figure_input.add_subplot(111)
 
-        self.axes.plot(self.input_data[0], self.input_data[1], color='blue')
-        self.axes.set_ylabel('Tritium content [T.U.]')
-        self.axes.set_xlabel('Year')
+        axes.plot(self.input_data[0], self.input_data[1], color='blue')
+        axes.set_ylabel('Tritium content [T.U.]')
+        axes.set_xlabel('Year')
+        self.canvas_input.draw_idle()
 
         self.input_data_form.show()
 
     def output_data_show_clicked(self):
+        """ Show plot of observations. """
+        with memory_profiler.measure('plot', 'observations'):
+            self.plot_observations()
+
+    def plot_observations(self):
         """ Show table with models data. """
+        if self.output_data_form is None:
+            self.setup_data_plots()
+
         if not self.canvas_observations_created:
-            self.figure_output = Figure(figsize=(3, 2), dpi=100)
-            self.canvas_output = FigureCanvas(self.figure_output)
+            from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+
+            self.figure_output, self.canvas_output = self.create_canvas()
             self.canvas_output.setMinimumSize(self.canvas_output.size())
             self.output_data_plot.plotWidgetLayout.addWidget(self.canvas_output)
             self.toolbar = NavigationToolbar(self.canvas_output, None)
@@ -358,11 +726,13 @@ class MainGui(Ui_Gui):
             self.canvas_output.draw()
             self.canvas_observations_created = True
 
-        self.axes = self.figure_output.add_subplot(111)
+        self.figure_output.clf()
+        axes = self.figure_output.add_subplot(111)
 
-        self.axes.plot(self.obs_data[0], self.obs_data[1], 'x', color='red')
-        self.axes.set_ylabel('Tritium content [T.U.]')
-        self.axes.set_xlabel('Year')
+        axes.plot(self.obs_data[0], self.obs_data[1], 'x', color='red')
+        axes.set_ylabel('Tritium content [T.U.]')
+        axes.set_xlabel('Year')
+        self.canvas_output.draw_idle()
 
         self.output_data_form.show()
 
@@ -374,7 +744,7 @@ class MainGui(Ui_Gui):
         elif self.checkButton.text() == 'Uncheck':
             self.savePushButton.setEnabled(True)
             self.deleteButton.setEnabled(True)
-        if any(self.plotListWidget.item(i).checkState() == QtCore.Qt.Checked for i in range(self.plotListWidget.count())):
+        if self.results.checked:
             self.checkButton.setText('Uncheck')
             self.savePushButton.setEnabled(True)
             self.deleteButton.setEnabled(True)
@@ -383,19 +753,45 @@ class MainGui(Ui_Gui):
             self.savePushButton.setEnabled(False)
             self.deleteButton.setEnabled(False)
 
-    def show_plot(self, fig_data):
-        """ Show plot. """
-        fig, data, index = fig_data
-        fig.clf()
+    def setup_plot_axes(self, fig):
+        """ Create axes and lines of results plot once, results are shown by replacing lines data. """
         self.axes = fig.add_subplot(111)
-
-        self.axes.plot(data.observations[0], data.observations[1], 'x', color='red')
-        self.axes.plot(data.output[0], data.output[1], color='blue')
-        self.axes.set_xlim([min(data.observations[0]) - 2, max(data.observations[0]) + 2])
-        self.axes.set_ylim([min(data.output[1]) - 2, max(data.output[1]) + 2])
+        self.observations_line, = self.axes.plot([], [], 'x', color='red')
+        self.output_line, = self.axes.plot([], [], color='blue')
         self.axes.set_ylabel('Tritium content [T.U.]')
         self.axes.set_xlabel('Year')
         fig.tight_layout()
+
+    def clear_plot(self):
+        """ Remove data of shown result from plot. """
+        if self.axes is not None:
+            self.observations_line.set_data([], [])
+            self.output_line.set_data([], [])
+            self.canvas.draw_idle()
+
+        if self.canvas_sweep_created:
+            self.canvas_sweep.hide()
+
+    def show_plot(self, result_id: int):
+        """ Show plot of result. """
+        with memory_profiler.measure('plot', 'result', result=result_id):
+            self.plot_result(result_id)
+
+    def plot_result(self, result_id: int):
+        """ Show plot. """
+        started = time.perf_counter() if trace_enabled() else None
+
+        data, texts = self.results[result_id].data, self.results[result_id].texts
+        if self.axes is None:
+            self.setup_plot_axes(self.figure)
+
+        self.observations_line.set_data(data.observations[0], data.observations[1])
+        self.output_line.set_data(data.output[0], data.output[1])
+        self.axes.set_xlim([min(data.observations[0]) - 2, max(data.observations[0]) + 2])
+        self.axes.set_ylim([min(data.output[1]) - 2, max(data.output[1]) + 2])
+
+        # spin boxes still set limits of axes, but the plot is drawn once below
+        self.updating_limits = True
         self.xlimDoubleSpinBox_1.setValue(min(data.observations[0]) - 2)
         self.xlimDoubleSpinBox_2.setValue(max(data.observations[0]) + 2)
 
@@ -403,24 +799,18 @@ class MainGui(Ui_Gui):
 
         self.ylimDoubleSpinBox_1.setValue(min(data.observations[1]) - 2)
         self.ylimDoubleSpinBox_2.setValue(max(data.observations[1]) + 2)
+        self.updating_limits = False
 
-        self.canvas.draw()
-
-        self.betaTextBrowser.setText(f'{data.beta}' if data.beta else '-')
+        self.limits_timer.stop()
+        self.canvas.draw_idle()
+        if started is not None:
+            self.plot_requested = (result_id, started)
 
-        params = self.params[data.model_type]['display']
-
-        if data.confidence_interval:
-            text = ', '.join(f'{i} = {j} {round_sig(k)}'
-                             for i, j, k in zip(params, data.params, data.confidence_interval))
-
-            text_level = ', '.join(f'{i * 100}% ({j})' for i, j in zip(data.confidence_level, params))
-        else:
-            text = ', '.join(f'{i} = {j} (-)' for i, j in zip(params, data.params))
-            text_level = ', '.join('-')
+        self.betaTextBrowser.setText(texts.beta)
+        self.paramsTextBrowser.setText(texts.params)
+        self.confidenceLevelTextBrowser.setText(texts.confidence_level)
 
-        self.paramsTextBrowser.setText(text)
-        self.confidenceLevelTextBrowser.setText(text_level)
+        self.show_sweep(result_id)
 
         self.modelTextBrowser.setText(data.model_type)
         self.mseTextBrowser.setText(f'{data.mse}')
@@ -433,27 +823,27 @@ class MainGui(Ui_Gui):
         self.modelTextBrowser.setAlignment(QtCore.Qt.AlignCenter)
         self.confidenceLevelTextBrowser.setAlignment(QtCore.Qt.AlignCenter)
 
-    def change_figure(self, item):
-        """ Change figure."""
-        text = item.text()
-        self.show_plot(self.fig_dict[text])
-
-    def add_figure(self, name, fig, data, index):
-        """ Add figure to dictionary and update table with params information. """
-        u = 0
-        if any(name in i for i in self.fig_dict.keys()):
-            u = len([i for i in self.fig_dict.keys() if name in i])
-        name = f'{name}_{u}'
+        if started is not None:
+            trace_event('show_plot', result=result_id, duration=time.perf_counter() - started)
 
-        self.fig_dict[f'{len(self.fig_dict.keys()) + 1}. {name}'] = (fig, data, index)
+    def plot_drawn(self, event=None):
+        """ Trace time from start of show_plot to the end of drawing of the result. """
+        if self.plot_requested is not None:
+            result_id, requested = self.plot_requested
+            self.plot_requested = None
+            trace_event('show_plot.drawn', result=result_id, duration=time.perf_counter() - requested)
 
-        item = QtWidgets.QListWidgetItem(f'{len(self.fig_dict.keys())}. {name}')
-        item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
-        item.setCheckState(QtCore.Qt.Unchecked)
+    def change_figure(self, index):
+        """ Change figure."""
+        self.show_plot(self.results_model.result_id(index))
 
-        self.plotListWidget.addItem(item)
+    def add_result(self, name, data, stats=None, config=None) -> int:
+        """ Add result to results list and update table with params information and fit statistics. """
+        result_id = self.results_model.add(name, data, stats, config)
+        entry = self.results[result_id]
+        self.table.update_table(entry.name, entry.data, entry.texts, entry.stats)
 
-        self.table.update_table(name, data)
+        return result_id
 
     def upper_bound_changed(self, y, label, value: float):
         """ Set warnings if lower bound is greater than upper. """
@@ -471,8 +861,42 @@ class MainGui(Ui_Gui):
         else:
             label.setText('')
 
+    def schedule_limits_redraw(self):
+        """ Redraw plot when axes limits stop changing, e.g. when arrow key of spin box is held. """
+        if not self.updating_limits:
+            self.limits_timer.start()
+
+    def invalidate_plot_background(self, event=None):
+        """ Fit layout of results plot to new size of canvas, cached background no longer matches it. """
+        self.plot_background = None
+        if self.axes is not None:
+            self.figure.tight_layout()
+
+    def redraw_limits(self):
+        """
+        Redraw results axes on cached figure background.
+
+        Limits change ticks around the axes too, so background is figure without axes, it is cached until canvas is
+        resized.
+        """
+        if self.axes is None:
+            return
+
+        if self.plot_background is None:
+            self.axes.set_visible(False)
+            self.canvas.draw()
+            self.plot_background = self.canvas.copy_from_bbox(self.figure.bbox)
+            self.axes.set_visible(True)
+
+        self.canvas.restore_region(self.plot_background)
+        self.axes.draw_artist(self.axes)
+        self.canvas.blit(self.figure.bbox)
+
     def axes_lower_bound_changed(self, x, x1, axis):
         """ Set minimum and maximum of axes if lower bound of axis is changed. """
+        if self.axes is None:
+            return
+
         if axis == 'Y':
             current_limits = self.axes.get_ylim()
         else:
@@ -485,13 +909,16 @@ class MainGui(Ui_Gui):
                 self.axes.set_ylim(bottom=value)
             else:
                 self.axes.set_xlim(left=value)
-            self.canvas.draw()
+            self.schedule_limits_redraw()
 
         x1.setMinimum(value)
         x.setMaximum(current_limits[1])
 
     def axes_upper_bound_changed(self, x, x1, axis):
         """ Set minimum and maximum of axes if upper bound of axis is changed. """
+        if self.axes is None:
+            return
+
         if axis == 'Y':
             current_limits = self.axes.get_ylim()
         else:
@@ -503,7 +930,7 @@ class MainGui(Ui_Gui):
                 self.axes.set_ylim(top=value)
             else:
                 self.axes.set_xlim(right=value)
-            self.canvas.draw()
+            self.schedule_limits_redraw()
 
         x1.setMinimum(current_limits[0])
         x.setMaximum(value)
@@ -516,16 +943,23 @@ class MainGui(Ui_Gui):
         # files buttons
         self.inputFileButton.clicked.connect(self.input_file_button_clicked)
         self.outputFileButton.clicked.connect(self.output_file_button_clicked)
+        self.batchFilesAction.triggered.connect(self.batch_files_clicked)
+        self.batchDirectoryAction.triggered.connect(self.batch_directory_clicked)
 
         # buttons
         self.startButton.clicked.connect(self.start_button_clicked)
+        self.pauseButton.clicked.connect(self.pause_button_clicked)
+        self.cancelButton.clicked.connect(self.cancel_button_clicked)
         self.closeButton.clicked.connect(self.close_button_clicked)
         self.closeButton_2.clicked.connect(self.close_button_clicked)
         self.goBackButton.clicked.connect(self.go_back_button_clicked)
         self.plotsButton.clicked.connect(self.plots_button_clicked)
+        self.diagnosticsButton.clicked.connect(self.diagnostics_button_clicked)
+        self.saveSessionAction.triggered.connect(self.save_session_clicked)
+        self.loadSessionAction.triggered.connect(self.load_session_clicked)
         self.ModelsPushButton.clicked.connect(self.table_button_clicked)
         self.checkButton.clicked.connect(self.check_button_clicked)
-        self.plotListWidget.itemChanged.connect(self.item_selected)
+        self.results_model.dataChanged.connect(self.item_selected)
 
         # show data buttons
         self.showInputDataButton.clicked.connect(self.input_data_show_clicked)
@@ -559,11 +993,17 @@ class MainGui(Ui_Gui):
         self.__setup_bounds_callbacks(self.PFM_timeDoubleSpinBox_1, self.PFM_timeDoubleSpinBox_2, self.PFMwrnLabel)
 
         # plot widget
-        self.plotListWidget.itemClicked.connect(self.change_figure)
+        self.plotListView.clicked.connect(self.change_figure)
 
-        self.savePushButton.clicked.connect(self.save_button_clicked)
+        self.saveDirectoriesAction.triggered.connect(self.save_button_clicked)
+        self.saveArchiveAction.triggered.connect(self.save_archive_clicked)
         self.deleteButton.clicked.connect(self.delete_button_clicked)
 
+        self.limits_timer = QtCore.QTimer()
+        self.limits_timer.setSingleShot(True)
+        self.limits_timer.setInterval(50)
+        self.limits_timer.timeout.connect(self.redraw_limits)
+
         self.__setup_axes_bounds_callbacks(self.xlimDoubleSpinBox_1, self.xlimDoubleSpinBox_2, 'X')
 
         self.__setup_axes_bounds_callbacks(self.ylimDoubleSpinBox_1, self.ylimDoubleSpinBox_2, 'Y')
@@ -629,6 +1069,7 @@ if __name__ == "__main__":
     Gui = QtWidgets.QWidget()
     ui = MainGui()
     ui.setupUi(Gui)
+    ui.setup_controls()
     ui.setup_callbacks()
 
     Gui.show()
@@ -1,11 +1,32 @@
 import csv
-from math import log10, floor
+from math import floor, isfinite, log10
 from pathlib import Path
+from typing import Dict
+from typing import Iterable
 from typing import List
-from typing import Tuple
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
 
 import numpy as np
 
+from fit_stats import STATS_HEADER
+from fit_stats import stats_row
+
+DATA_FILES_SUFFIXES = ('.xlsx', '.xls', '.csv')
+
+MODELS_PARAMS: Dict[str, Dict[str, List[str]]] = {
+    'PFM': {'display': ['\u03C4'], 'csv': ['T']},
+    'EM': {'display': ['\u03C4'], 'csv': ['T']},
+    'EPM': {'display': ['\u03C4', '\u03B7'], 'csv': ['T', 'n']},
+    'DM': {'display': ['\u03C4', 'PD'], 'csv': ['T', 'PD']}
+}
+
+# arrays up to this size are rounded number by number, numpy calls cost more than that
+SMALL_ROUND_SIZE = 16
+
+PARAMETERS_HEADER = ['Name', 'Model Type', 'Params', 'Confidence Level', 'Beta', 'MSE', 'ME'] + STATS_HEADER
+
 
 def save_to_csv(file_path: Path, model_data: List[str], x: np.ndarray, y: np.ndarray):
     """
@@ -19,23 +40,216 @@ def save_to_csv(file_path: Path, model_data: List[str], x: np.ndarray, y: np.nda
     with open(file_path, 'w') as csvfile:
         writer = csv.writer(csvfile, delimiter=',')
         writer.writerow(model_data)
-        for row in zip(x, y):
-            writer.writerow(row)
+        writer.writerows(zip(x, y))
 
 
-def round_sig(numbers: Tuple[float], sig: int=2):
+def round_sig_number(number: float, sig: int = 2) -> float:
+    """ Round single number to significant places. """
+    if number == 0 or not isfinite(number):
+        return number
+
+    return round(number, sig - int(floor(log10(abs(number)))) - 1)
+
+
+def round_sig(numbers, sig: int = 2) -> np.ndarray:
     """
-    Round number to significant places.
+    Round numbers to significant places.
 
-    :param numbers: number sto be rounded
+    :param numbers: numbers to be rounded, array of any shape
     :param sig: number of significant places
-    :return: rounded number
+    :return: array of rounded numbers, zeros and non-finite numbers are not changed
+    """
+    numbers = np.asarray(numbers, dtype=float)
+    if numbers.size <= SMALL_ROUND_SIZE:
+        return np.array([round_sig_number(number, sig) for number in numbers.ravel().tolist()]).reshape(numbers.shape)
+
+    finite = np.isfinite(numbers) & (numbers != 0)
+
+    magnitude = np.floor(np.log10(np.abs(numbers, where=finite, out=np.ones_like(numbers))))
+    decimals = sig - 1 - magnitude
+    scale = 10.0 ** np.abs(decimals)
+    scaled = np.where(decimals >= 0, numbers * scale, numbers / scale)
+    rounded = np.where(decimals >= 0, np.round(scaled) / scale, np.round(scaled) * scale)
+    rounded = np.where(finite, rounded, numbers)
+
+    # scaling can turn number slightly below/above half into exact half, these are rounded exactly like round does
+    ties = np.flatnonzero(np.abs(np.where(finite, scaled, 0)) % 1 == 0.5)
+    flat_numbers, flat_decimals, flat_rounded = numbers.ravel(), decimals.ravel(), rounded.reshape(-1)
+    for index in ties:
+        flat_rounded[index] = round(float(flat_numbers[index]), int(flat_decimals[index]))
+
+    return rounded
+
+
+class ResultTexts(NamedTuple):
+    """ Formatted parameters of fitting result, computed once and shared by plot, table and exports. """
+    params: str
+    confidence_level: str
+    table_params: str
+    beta: str
+    csv_header: List[str]
+
+
+def result_texts(data, rounded_intervals: Optional[list] = None) -> ResultTexts:
     """
-    final = []
-    for number in numbers:
-        if number == 0:
-            final.append(0)
+    Format parameters of fitting result, confidence intervals of all parameters are rounded at once.
+
+    :param data: fitting result
+    :param rounded_intervals: confidence intervals already rounded by round_sig, rounded here if not given
+    :return: formatted texts
+    """
+    display = MODELS_PARAMS[data.model_type]['display']
+    csv_names = MODELS_PARAMS[data.model_type]['csv']
+
+    if data.confidence_interval:
+        if rounded_intervals is None:
+            rounded_intervals = round_sig(data.confidence_interval).tolist()
+        # zero bound is shown as 0, not 0.0
+        intervals = [str(tuple(0 if bound == 0 else bound for bound in interval)) for interval in rounded_intervals]
+        params = ', '.join(f'{i} = {j} {k}' for i, j, k in zip(display, data.params, intervals))
+        confidence_level = ', '.join(f'{i * 100}% ({j})' for i, j in zip(data.confidence_level, display))
+        table_params = ', '.join(f'{i} {j}' for i, j in zip(data.params, intervals))
+        header = [f'{i}={j} {k}' for i, j, k in zip(csv_names, data.params, intervals)]
+    else:
+        params = ', '.join(f'{i} = {j} (-)' for i, j in zip(display, data.params))
+        confidence_level = '-'
+        table_params = ', '.join(f'{i} (-)' for i in data.params)
+        header = [f'{i}={j} (-)' for i, j in zip(csv_names, data.params)]
+
+    header = [data.model_type] + header
+    if data.beta:
+        header.append(f'beta={data.beta}')
+
+    return ResultTexts(params, confidence_level, table_params, str(data.beta) if data.beta else '-', header)
+
+
+def results_texts(results: Sequence) -> List[ResultTexts]:
+    """
+    Format parameters of many fitting results, confidence intervals of all of them are rounded by single round_sig.
+
+    :param results: fitting results
+    :return: formatted texts of every result
+    """
+    intervals = [np.asarray(data.confidence_interval, dtype=float).reshape(-1, 2) if data.confidence_interval else
+                 np.empty((0, 2)) for data in results]
+    if not intervals:
+        return []
+
+    rounded = round_sig(np.concatenate(intervals)).tolist()
+    texts, start = [], 0
+    for data, result_intervals in zip(results, intervals):
+        texts.append(result_texts(data, rounded[start:start + len(result_intervals)]))
+        start += len(result_intervals)
+
+    return texts
+
+
+def collect_data_files(paths: Iterable[str]) -> List[Path]:
+    """
+    Collect data files from given files and directories.
+
+    :param paths: paths to files or directories, directories are searched (non-recursively) for data files
+    :return: sorted paths of data files
+    """
+    files = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.update(i for i in path.iterdir() if i.is_file() and i.suffix.lower() in DATA_FILES_SUFFIXES)
         else:
-            final.append(round(number, sig-int(floor(log10(abs(number))))-1))
+            files.add(path)
+
+    return sorted(files)
+
+
+def save_result(path: Path, data, texts: Optional[ResultTexts] = None):
+    """
+    Save output and response function of fitting result to directory.
+
+    :param path: directory, created if it does not exist
+    :param data: fitting result
+    :param texts: formatted parameters of result, computed if not given
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    header = (texts or result_texts(data)).csv_header
+
+    x_o, y_o = data.output
+    save_to_csv(Path(path, 'output.csv'), header, x_o, y_o)
+
+    if not data.model_type == 'PFM':
+        x_rf, y_rf = data.response_function
+        save_to_csv(Path(path, 'response_function.csv'), header, x_rf, y_rf)
+
+
+def parameters_row(name: str, data, texts: Optional[ResultTexts] = None, stats=None) -> List[str]:
+    """
+    Row of parameters table.
+
+    :param name: name of result
+    :param data: fitting result
+    :param texts: formatted parameters of result, computed if not given
+    :param stats: FitStats of result, None if they are not known
+    :return: row matching PARAMETERS_HEADER
+    """
+    texts = texts or result_texts(data)
+
+    return [name, data.model_type, texts.table_params, texts.confidence_level, texts.beta, str(data.mse),
+            str(data.model_efficiency)] + stats_row(stats)
+
+
+def save_parameters(file_path: Path, rows: Iterable[List[str]]):
+    """
+    Save parameters table to csv.
+
+    :param file_path: file's path
+    :param rows: rows matching PARAMETERS_HEADER
+    """
+    with open(file_path, 'w') as csvfile:
+        writer = csv.writer(csvfile, delimiter=';')
+        writer.writerow(PARAMETERS_HEADER)
+        writer.writerows(rows)
+
+
+def is_number(value) -> bool:
+    """ Value is int or float, bool (a JSON true or false) is not a number. """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def parse_models_configs(configs: list) -> list:
+    """
+    Validate models configurations in the structure used by MainGui.get_models_configs.
+
+    :param configs: list of [model type, ((lower, upper), ...)] or [model type, ((lower, upper), ...), beta]
+    :return: models configurations with bounds as tuples
+    """
+    if not isinstance(configs, list):
+        raise ValueError('Models configurations must be a list')
+
+    models = []
+    for config in configs:
+        if not isinstance(config, list) or not 2 <= len(config) <= 3:
+            raise ValueError(f'Wrong model configuration: {config}')
+
+        model_type, bounds = config[0], config[1]
+        if not isinstance(model_type, str) or model_type not in MODELS_PARAMS:
+            raise ValueError(f'Unknown model type: {model_type}. Use one of: {", ".join(MODELS_PARAMS)}')
+
+        if not isinstance(bounds, (list, tuple)) or len(bounds) != len(MODELS_PARAMS[model_type]['csv']):
+            raise ValueError(f'{model_type} needs bounds of {len(MODELS_PARAMS[model_type]["csv"])} parameters')
+
+        if not all(isinstance(pair, (list, tuple)) and len(pair) == 2 and all(is_number(value) for value in pair)
+                   for pair in bounds):
+            raise ValueError(f'{model_type}: bounds must be pairs of numbers (lower, upper)')
+
+        bounds = tuple((float(lower), float(upper)) for lower, upper in bounds)
+        if any(lower > upper for lower, upper in bounds):
+            raise ValueError(f'{model_type}: lower bound is greater than upper')
+
+        model = [model_type, bounds]
+        if len(config) == 3:
+            if not is_number(config[2]):
+                raise ValueError(f'{model_type}: beta must be a number')
+            model.append(float(config[2]))
+
+        models.append(model)
 
-    return tuple(final)
+    return models
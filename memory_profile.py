@@ -0,0 +1,190 @@
+"""
+Opt-in memory profiling of calculations, exports and plots.
+
+With TRACER_GUI_MEMORY_PROFILE=1 tracemalloc is started and every measured operation takes snapshots before and after
+it. Peak is the highest traced memory during the operation above the memory traced at its start, retained is the
+memory which is still allocated when it ends. Reports are summed per subsystem for the diagnostics panel and written
+to the trace file as 'memory' events.
+
+Comparing snapshots takes seconds with large heaps, so source lines with the largest retained allocations are found in
+background thread and the report is added after that. Only one pair of snapshots is compared at a time, operations
+measured meanwhile report peak and retained memory without source lines.
+
+Only memory of this process is traced, fits running in process workers are seen by the results they send back.
+Operations running at the same time (e.g. plot opened during calculation) share the traced memory, so memory of the
+plot is counted also in the calculation. Starting an operation resets peak of traced memory, the peak reached until
+then is kept by the operations which are already running.
+"""
+import threading
+import tracemalloc
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import settings
+from run_trace import NULL_SPAN
+from run_trace import event
+
+# allocations of the profiling itself are not reported
+IGNORED_FILES = (tracemalloc.__file__, __file__)
+
+
+class MemoryReport(NamedTuple):
+    """ Memory of single operation in bytes. """
+    subsystem: str
+    operation: str
+    peak: Optional[int]
+    retained: int
+    top: List[Tuple[str, int]]
+
+
+class SubsystemMemory(NamedTuple):
+    """ Memory of all operations of subsystem in bytes. """
+    operations: int = 0
+    max_peak: Optional[int] = None
+    retained: int = 0
+    last: Optional[MemoryReport] = None
+
+
+class Measurement:
+    """ Context manager measuring memory of operation. """
+
+    def __init__(self, profiler: 'MemoryProfiler', subsystem: str, operation: str, fields: dict):
+        self.profiler = profiler
+        self.subsystem = subsystem
+        self.operation = operation
+        self.fields = fields
+        self.before = None
+        self.start = 0
+        # highest traced memory before peak was reset by operations started meanwhile
+        self.peak = 0
+
+    def __enter__(self):
+        self.before = tracemalloc.take_snapshot() if self.profiler.acquire_snapshots() else None
+        self.start = self.profiler.start_measurement(self)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        current, peak = self.profiler.end_measurement(self)
+        report = MemoryReport(self.subsystem, self.operation,
+                              max(peak - self.start, 0) if hasattr(tracemalloc, 'reset_peak') else None,
+                              current - self.start, [])
+
+        if self.before is None:
+            self.profiler.add(report, self.fields)
+        else:
+            before, self.before = self.before, None
+            threading.Thread(target=self.profiler.add_compared, args=(report, self.fields, before,
+                                                                      tracemalloc.take_snapshot()),
+                             name='memory_profile', daemon=True).start()
+
+        return False
+
+
+class MemoryProfiler:
+    """ Memory reports of operations summed per subsystem. """
+
+    def __init__(self, enabled: bool, top: int = 5):
+        """
+        :param enabled: without it measure does nothing
+        :param top: number of reported source lines with the largest retained allocations
+        """
+        self.enabled = enabled
+        self.top = top
+        self.subsystems: Dict[str, SubsystemMemory] = OrderedDict()
+        self.lock = threading.Lock()
+        self.comparing = False
+        self.active: List[Measurement] = []
+
+    def measure(self, subsystem: str, operation: Optional[str] = None, **fields):
+        """
+        Measure memory of block:
+
+            with memory_profiler.measure('export', 'archive'):
+                ...
+
+        :param subsystem: e.g. 'calculation', 'export' or 'plot'
+        :param operation: name of operation within subsystem, subsystem by default
+        :param fields: written to trace with the report
+        """
+        if not self.enabled:
+            return NULL_SPAN
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        return Measurement(self, subsystem, operation or subsystem, fields)
+
+    def start_measurement(self, measurement: Measurement) -> int:
+        """
+        Reset peak of traced memory for measurement, running measurements keep the peak reached so far.
+
+        :return: currently traced memory
+        """
+        with self.lock:
+            # peak can be reset since Python 3.9, before that only peak of the whole session is known
+            if hasattr(tracemalloc, 'reset_peak'):
+                peak = tracemalloc.get_traced_memory()[1]
+                for running in self.active:
+                    running.peak = max(running.peak, peak)
+                tracemalloc.reset_peak()
+            self.active.append(measurement)
+
+            return tracemalloc.get_traced_memory()[0]
+
+    def end_measurement(self, measurement: Measurement) -> Tuple[int, int]:
+        """
+        :return: currently traced memory and its peak during measurement
+        """
+        with self.lock:
+            self.active.remove(measurement)
+            current, peak = tracemalloc.get_traced_memory()
+
+        return current, max(peak, measurement.peak)
+
+    def acquire_snapshots(self) -> bool:
+        """ Reserve comparison of snapshots for operation, False if other operation has it. """
+        with self.lock:
+            if self.comparing:
+                return False
+            self.comparing = True
+
+        return True
+
+    def add_compared(self, report: MemoryReport, fields: dict, before: tracemalloc.Snapshot,
+                     after: tracemalloc.Snapshot):
+        """ Add report with source lines of the largest differences between snapshots. """
+        try:
+            top = []
+            for stat in after.compare_to(before, 'lineno'):
+                if len(top) == self.top:
+                    break
+                if stat.size_diff and stat.traceback[0].filename not in IGNORED_FILES:
+                    top.append((str(stat.traceback[0]), stat.size_diff))
+        finally:
+            with self.lock:
+                self.comparing = False
+
+        self.add(report._replace(top=top), fields)
+
+    def add(self, report: MemoryReport, fields: Optional[dict] = None):
+        with self.lock:
+            memory = self.subsystems.get(report.subsystem, SubsystemMemory())
+            peaks = [i for i in (memory.max_peak, report.peak) if i is not None]
+            self.subsystems[report.subsystem] = SubsystemMemory(memory.operations + 1, max(peaks) if peaks else None,
+                                                                memory.retained + report.retained, report)
+
+        event('memory', subsystem=report.subsystem, operation=report.operation, peak=report.peak,
+              retained=report.retained, top=report.top, **(fields or {}))
+
+    def summary(self) -> Dict[str, SubsystemMemory]:
+        with self.lock:
+            return OrderedDict(self.subsystems)
+
+    @staticmethod
+    def traced_memory() -> Tuple[int, int]:
+        """ Currently traced memory and its peak in bytes. """
+        return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+
+memory_profiler = MemoryProfiler(settings.MEMORY_PROFILE)
@@ -0,0 +1,114 @@
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    """
+    Format remaining time.
+
+    :param seconds: remaining time or None if it is not known
+    :return: text like '1h 02m', '3m 15s' or '12s'
+    """
+    if seconds is None:
+        return '-'
+
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f'{seconds // 3600}h {seconds % 3600 // 60:02d}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m {seconds % 60:02d}s'
+
+    return f'{seconds}s'
+
+
+class ProgressTracker:
+    """
+    Estimate progress of fits from their expected durations.
+
+    Durations of finished tasks are remembered per (task type, model type, uncertainty) in history, which the owner
+    passes to trackers of later runs. Running tasks contribute part of their expected duration, so progress moves while
+    a single long fit is running. Until every kind of task has finished once, only the number of running tasks and
+    their elapsed time are known.
+    """
+
+    def __init__(self, tasks, workers: int, history: Optional[Dict[Hashable, Tuple[float, int]]] = None,
+                 min_interval: float = 0.25):
+        """
+        :param history: total duration and count of finished tasks per kind, updated by the tracker
+        """
+        self.kinds = {task.key: self.kind(task) for task in tasks}
+        self.history = {} if history is None else history
+        self.workers = workers
+        self.min_interval = min_interval
+        self.started_at: Dict[Hashable, float] = {}
+        self.finished = set()
+        self.best_mse: Optional[float] = None
+        self.last_report = 0.0
+
+    @staticmethod
+    def kind(task) -> Hashable:
+        return type(task).__name__, task.model[0], bool(getattr(task, 'calculate_uncertainty', False))
+
+    def expected(self, kind: Hashable) -> Optional[float]:
+        if kind in self.history:
+            total, count = self.history[kind]
+            return total / count
+
+        known = [total / count for total, count in self.history.values()]
+        return sum(known) / len(known) if known else None
+
+    def task_started(self, task):
+        self.started_at[task.key] = time.monotonic()
+
+    def task_finished(self, task, mse: Optional[float] = None):
+        """ Mark task as finished, tasks which were not started (cached results) do not update durations. """
+        self.finished.add(task.key)
+
+        start = self.started_at.pop(task.key, None)
+        if start is not None:
+            total, count = self.history.get(self.kinds[task.key], (0.0, 0))
+            self.history[self.kinds[task.key]] = (total + time.monotonic() - start, count + 1)
+
+        if mse is not None and (self.best_mse is None or mse < self.best_mse):
+            self.best_mse = mse
+
+    def running(self) -> Tuple[int, Optional[float]]:
+        """
+        :return: number of running tasks and time since the first of them started (None if none is running)
+        """
+        if not self.started_at:
+            return 0, None
+
+        return len(self.started_at), time.monotonic() - min(self.started_at.values())
+
+    def estimate(self) -> Tuple[float, Optional[float]]:
+        """
+        :return: finished fraction (0 - 1) and remaining time in seconds (None if it is not known yet)
+        """
+        total = len(self.kinds)
+        if not total:
+            return 1.0, 0.0
+
+        expected = {key: self.expected(kind) for key, kind in self.kinds.items()}
+        if any(value is None for value in expected.values()):
+            return len(self.finished) / total, None
+
+        now = time.monotonic()
+        done = sum(expected[key] for key in self.finished)
+        # running fit is never reported as finished before it really ends
+        done += sum(min(now - start, 0.95 * expected[key]) for key, start in self.started_at.items())
+        work = sum(expected.values()) or 1.0
+
+        remaining = len(self.kinds) - len(self.finished)
+        eta = (work - done) / max(min(self.workers, remaining), 1)
+
+        return done / work, eta
+
+    def due(self) -> bool:
+        """ Throttle reports to one per min_interval. """
+        now = time.monotonic()
+        if now - self.last_report < self.min_interval:
+            return False
+
+        self.last_report = now
+        return True
@@ -0,0 +1,122 @@
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+import settings
+
+
+def series_hash(data) -> str:
+    """
+    Hash of data series.
+
+    :param data: sequence of data series
+    :return: hex digest
+    """
+    digest = hashlib.sha1()
+    for series in data:
+        array = np.ascontiguousarray(series, dtype=np.float64)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+
+    return digest.hexdigest()
+
+
+def fit_key(task) -> str:
+    """
+    Content address of fit task.
+
+    :param task: FitTask
+    :return: hex digest of input, observations, alpha, uncertainty flag and model configuration
+    """
+    model = [task.model[0], [[float(i) for i in bounds] for bounds in task.model[1]]] + \
+            [float(i) for i in task.model[2:]]
+    digest = hashlib.sha1()
+    digest.update(series_hash(task.input).encode())
+    digest.update(series_hash(task.obs).encode())
+    digest.update(repr((float(task.alpha), bool(task.calculate_uncertainty), model)).encode())
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Fitting results keyed by fit_key, least recently used are evicted. Optionally persisted in directory.
+
+    Results are copied in and out, so a consumer changing its results does not change those of the others.
+    """
+
+    def __init__(self, max_entries: int, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        """
+        Get fitting results.
+
+        :param key: fit_key of task
+        :return: copy of results or None
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                data = self.entries[key]
+            else:
+                data = None
+
+        if data is not None:
+            return copy.deepcopy(data)
+
+        if self.directory is None:
+            return None
+
+        try:
+            with open(Path(self.directory, f'{key}.pickle'), 'rb') as file:
+                data = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+        self.put(key, data, persist=False)
+
+        return data
+
+    def put(self, key: str, data, persist: bool = True):
+        with self.lock:
+            self.entries[key] = copy.deepcopy(data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        if persist and self.directory is not None:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                file = tempfile.NamedTemporaryFile(dir=self.directory, delete=False)
+            except OSError:
+                return
+
+            try:
+                with file:
+                    pickle.dump(data, file)
+                os.replace(file.name, Path(self.directory, f'{key}.pickle'))
+            except Exception:
+                # results which cannot be pickled are kept only in memory
+                try:
+                    os.remove(file.name)
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+result_cache = ResultCache(settings.RESULT_CACHE_ENTRIES, settings.RESULT_CACHE_DIR)
@@ -0,0 +1,95 @@
+"""
+Compact records of fitting results kept in results list.
+
+Curves are stored as contiguous float arrays. Time grids and observations are interned in SeriesStore, so results of
+the same well (or with the same output grid) share single array instead of keeping their own copies. Fitted values can
+be stored as float32 (TRACER_GUI_FLOAT32_CURVES=1), time grids and observations are always kept in float64.
+"""
+import weakref
+from typing import Optional, Tuple
+
+import numpy as np
+
+import settings
+from result_cache import series_hash
+from session import SessionResult
+
+# attributes of FittingResult used by GUI and exports
+RESULT_FIELDS = ('model_type', 'params', 'mse', 'model_efficiency', 'beta', 'confidence_interval',
+                 'confidence_level', 'output', 'response_function', 'observations')
+
+
+class SeriesStore:
+    """ Interned read-only arrays of data series, an array is released with the last result using it. """
+
+    def __init__(self):
+        self.arrays = weakref.WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self.arrays)
+
+    def intern(self, series) -> np.ndarray:
+        """ Array with values of series, the same array for all equal series. """
+        key = series_hash([series])
+        array = self.arrays.get(key)
+        if array is None:
+            array = np.array(series, dtype=np.float64)
+            array.flags.writeable = False
+            self.arrays[key] = array
+
+        return array
+
+
+class ResultRecord:
+    """ Fitting result with the attributes of FittingResult used by GUI and exports, curves are (x, y) arrays. """
+
+    __slots__ = RESULT_FIELDS
+
+    def __init__(self, model_type: str, params: list, mse: float, model_efficiency: float, beta: Optional[float],
+                 confidence_interval: Optional[list], confidence_level: Optional[list],
+                 output: Tuple[np.ndarray, np.ndarray], response_function: Optional[Tuple[np.ndarray, np.ndarray]],
+                 observations: Tuple[np.ndarray, np.ndarray]):
+        self.model_type = model_type
+        self.params = params
+        self.mse = mse
+        self.model_efficiency = model_efficiency
+        self.beta = beta
+        self.confidence_interval = confidence_interval
+        self.confidence_level = confidence_level
+        self.output = output
+        self.response_function = response_function
+        self.observations = observations
+
+
+def curve_values(values, store: SeriesStore, shared: bool) -> np.ndarray:
+    """
+    :param shared: values are shared by results (time grid, observations), they are interned in store then
+    """
+    if shared:
+        return store.intern(values)
+
+    return np.array(values, dtype=np.float32 if settings.FLOAT32_CURVES else np.float64)
+
+
+def compact_result(data, store: SeriesStore):
+    """
+    Compact record of fitting result.
+
+    :param data: fitting result, records and results loaded from session (which read curves lazily) are returned as
+                 they are
+    :param store: interned time grids and observations
+    """
+    if isinstance(data, (ResultRecord, SessionResult)):
+        return data
+
+    output_x, output_y = data.output
+    observations_x, observations_y = data.observations
+    response_function = None
+    if data.model_type != 'PFM' and data.response_function is not None:
+        response_x, response_y = data.response_function
+        response_function = (curve_values(response_x, store, True), curve_values(response_y, store, False))
+
+    return ResultRecord(data.model_type, list(data.params), data.mse, data.model_efficiency, data.beta,
+                        data.confidence_interval, data.confidence_level,
+                        (curve_values(output_x, store, True), curve_values(output_y, store, False)), response_function,
+                        (curve_values(observations_x, store, True), curve_values(observations_y, store, True)))
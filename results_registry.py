@@ -0,0 +1,212 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from PyQt5 import QtCore
+
+from fit_stats import FitStats
+from gui_utils import ResultTexts
+from gui_utils import result_texts
+from gui_utils import results_texts
+from result_record import SeriesStore
+from result_record import compact_result
+from session import FitConfig
+from session import SessionEntry
+
+
+class ResultEntry(NamedTuple):
+    """ Result shown in results list. """
+    name: str
+    data: object
+    texts: ResultTexts
+    stats: Optional[FitStats] = None
+    config: Optional[FitConfig] = None
+
+
+class ResultRegistry:
+    """
+    Results of the session under stable integer ids.
+
+    Position of result in list (and its displayed number) is derived from order of ids, so removing results does not
+    rename the remaining ones. Results are kept as compact records sharing time grids and observations.
+    """
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.entries: Dict[int, ResultEntry] = {}
+        self.checked = set()
+        self.name_counters: Dict[str, int] = {}
+        # names of results in list, exports write every result to file of its name
+        self.names = set()
+        self.next_id = 0
+        self.rows: Optional[Dict[int, int]] = {}
+        self.series = SeriesStore()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, result_id: int) -> bool:
+        return result_id in self.entries
+
+    def __getitem__(self, result_id: int) -> ResultEntry:
+        return self.entries[result_id]
+
+    def unique_name(self, name: str) -> str:
+        """ Name with suffix counting results of the same name, e.g. well_0, well_1, not used by any result. """
+        while True:
+            count = self.name_counters.get(name, 0)
+            self.name_counters[name] = count + 1
+            if f'{name}_{count}' not in self.names:
+                return f'{name}_{count}'
+
+    def reserve_name(self, name: str) -> str:
+        """
+        Keep name given by unique_name (e.g. of loaded result) from being given again.
+
+        :return: the name, or new name given by unique_name if a result of the name is already in list
+        """
+        base, _, count = name.rpartition('_')
+        if not (base and count.isdigit()):
+            base = name
+        elif name not in self.names:
+            self.name_counters[base] = max(self.name_counters.get(base, 0), int(count) + 1)
+
+        return self.unique_name(base) if name in self.names else name
+
+    def add(self, name: str, data, stats: Optional[FitStats] = None, config: Optional[FitConfig] = None,
+            unique: bool = True, texts: Optional[ResultTexts] = None) -> int:
+        """
+        Register result.
+
+        :param name: name of result, suffix is added to it
+        :param stats: cost of fit, None if it is not known
+        :param config: configuration which produced result
+        :param unique: add suffix to name, otherwise name is kept (e.g. name of loaded result) unless it is taken
+        :param texts: formatted parameters of result, computed if not given
+        :return: id of result
+        """
+        result_id = self.next_id
+        self.next_id += 1
+
+        name = self.unique_name(name) if unique else self.reserve_name(name)
+        self.names.add(name)
+
+        data = compact_result(data, self.series)
+        self.entries[result_id] = ResultEntry(name, data, texts or result_texts(data), stats, config)
+        if self.rows is not None:
+            self.rows[result_id] = len(self.ids)
+        self.ids.append(result_id)
+
+        return result_id
+
+    def remove(self, result_ids: Iterable[int]) -> List[int]:
+        """
+        Remove results.
+
+        :return: former rows of removed results
+        """
+        removed = set(result_ids) & self.entries.keys()
+        rows = [row for row, result_id in enumerate(self.ids) if result_id in removed]
+
+        self.ids = [result_id for result_id in self.ids if result_id not in removed]
+        for result_id in removed:
+            self.names.discard(self.entries.pop(result_id).name)
+        self.checked -= removed
+        # rows are rebuilt when needed
+        self.rows = None
+
+        return rows
+
+    def row(self, result_id: int) -> int:
+        """ Position of result in list. """
+        if self.rows is None:
+            self.rows = {result_id: row for row, result_id in enumerate(self.ids)}
+
+        return self.rows[result_id]
+
+    def checked_ids(self) -> List[int]:
+        """ Ids of checked results in order of list. """
+        return [result_id for result_id in self.ids if result_id in self.checked]
+
+
+class ResultsListModel(QtCore.QAbstractListModel):
+    """ Checkable list of results, items are displayed as 'number. name'. """
+
+    def __init__(self, registry: ResultRegistry, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.registry)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        result_id = self.registry.ids[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return f'{index.row() + 1}. {self.registry[result_id].name}'
+        if role == QtCore.Qt.CheckStateRole:
+            return QtCore.Qt.Checked if result_id in self.registry.checked else QtCore.Qt.Unchecked
+
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole) -> bool:
+        if not index.isValid() or role != QtCore.Qt.CheckStateRole:
+            return False
+
+        result_id = self.registry.ids[index.row()]
+        if value == QtCore.Qt.Checked:
+            self.registry.checked.add(result_id)
+        else:
+            self.registry.checked.discard(result_id)
+        self.dataChanged.emit(index, index, [QtCore.Qt.CheckStateRole])
+
+        return True
+
+    def flags(self, index):
+        return super().flags(index) | QtCore.Qt.ItemIsUserCheckable
+
+    def result_id(self, index) -> Optional[int]:
+        """ Id of result at index of view. """
+        return self.registry.ids[index.row()] if index.isValid() else None
+
+    def add(self, name: str, data, stats: Optional[FitStats] = None, config: Optional[FitConfig] = None) -> int:
+        """ Register result and show it at the end of list. """
+        row = len(self.registry)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        result_id = self.registry.add(name, data, stats, config)
+        self.endInsertRows()
+
+        return result_id
+
+    def extend(self, entries: List[SessionEntry]) -> List[int]:
+        """ Register loaded results with their names and check states in one insertion. """
+        if not entries:
+            return []
+
+        row = len(self.registry)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(entries) - 1)
+        result_ids = []
+        for entry, texts in zip(entries, results_texts([entry.data for entry in entries])):
+            result_ids.append(self.registry.add(entry.name, entry.data, entry.stats, entry.config, False, texts))
+            if entry.checked:
+                self.registry.checked.add(result_ids[-1])
+        self.endInsertRows()
+
+        return result_ids
+
+    def set_all_checked(self, checked: bool):
+        self.registry.checked = set(self.registry.ids) if checked else set()
+        if len(self.registry):
+            self.dataChanged.emit(self.index(0), self.index(len(self.registry) - 1), [QtCore.Qt.CheckStateRole])
+
+    def remove(self, result_ids: Iterable[int]) -> List[int]:
+        """
+        Remove results in one reset of model.
+
+        :return: former rows of removed results
+        """
+        self.beginResetModel()
+        rows = self.registry.remove(result_ids)
+        self.endResetModel()
+
+        return rows
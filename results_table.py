@@ -0,0 +1,185 @@
+from pathlib import Path
+from typing import Iterable, List
+
+import numpy as np
+from PyQt5 import QtCore
+
+from fit_stats import FitStats
+from fit_stats import STATS_HEADER
+from fit_stats import format_stat
+from fit_stats import stats_values
+from gui_utils import parameters_row
+from gui_utils import save_parameters
+
+HEADER = ['Name', 'Model Type', 'Parameters', 'Confidence Level', 'Beta', 'MSE', 'ME'] + STATS_HEADER
+# columns of HEADER stored as float arrays, the other ones are stored as text, unknown statistics are NaN
+NUMERIC_COLUMNS = {5: 'mse', 6: 'me', **{7 + index: name for index, name in enumerate(FitStats._fields)}}
+
+
+class ResultsTableModel(QtCore.QAbstractTableModel):
+    """
+    Table of fitting results stored by columns.
+
+    Results keep their insertion index, which is used by set_row and remove_rows. Sorting only permutes order of rows
+    shown in view, the columns are not copied.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.text_columns: List[List[str]] = [[] for column in range(len(HEADER)) if column not in NUMERIC_COLUMNS]
+        self.text_index = [column for column in range(len(HEADER)) if column not in NUMERIC_COLUMNS]
+        for name in NUMERIC_COLUMNS.values():
+            setattr(self, name, np.empty(0))
+        self.size = 0
+        self.order = np.arange(0)
+        self.sort_column = -1
+        self.sort_order = QtCore.Qt.AscendingOrder
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.size
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADER)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return HEADER[section]
+
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == QtCore.Qt.DisplayRole:
+            return self.text(int(self.order[index.row()]), index.column())
+        if role == QtCore.Qt.TextAlignmentRole:
+            return QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter
+
+        return None
+
+    def text(self, row: int, column: int) -> str:
+        """ Text of cell in given result's row. """
+        if column in NUMERIC_COLUMNS:
+            return self.format(NUMERIC_COLUMNS[column], getattr(self, NUMERIC_COLUMNS[column])[row])
+
+        return self.text_columns[self.text_index.index(column)][row]
+
+    @staticmethod
+    def format(name: str, value) -> str:
+        return str(value) if name in ('mse', 'me') else format_stat(name, value)
+
+    def column(self, column: int) -> list:
+        """ Values of column in order of view. """
+        if column in NUMERIC_COLUMNS:
+            name = NUMERIC_COLUMNS[column]
+            values = getattr(self, name)[:self.size]
+            return [self.format(name, value) for value in values[self.order]]
+
+        values = self.text_columns[self.text_index.index(column)]
+        return [values[row] for row in self.order]
+
+    def reserve(self, size: int):
+        """ Grow numeric columns geometrically, so appending results one by one is not quadratic. """
+        if size <= len(self.mse):
+            return
+
+        capacity = max(size, 2 * len(self.mse), 64)
+        for name in NUMERIC_COLUMNS.values():
+            column = np.empty(capacity)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+
+    def store(self, row: int, name: str, data, texts=None, stats=None):
+        values = parameters_row(name, data, texts, stats)
+        for column, text_column in zip(self.text_index, self.text_columns):
+            if row < len(text_column):
+                text_column[row] = values[column]
+            else:
+                text_column.append(values[column])
+
+        self.mse[row] = data.mse
+        self.me[row] = data.model_efficiency
+        for field, value in zip(FitStats._fields, stats_values(stats)):
+            getattr(self, field)[row] = value
+
+    def append_rows(self, rows: Iterable[tuple]):
+        """
+        Append results in one insertion.
+
+        :param rows: (name, fitting result, formatted texts or None, FitStats or None) tuples
+        """
+        rows = list(rows)
+        if not rows:
+            return
+
+        self.beginInsertRows(QtCore.QModelIndex(), self.size, self.size + len(rows) - 1)
+        self.reserve(self.size + len(rows))
+        for row, (name, data, texts, stats) in enumerate(rows, self.size):
+            self.store(row, name, data, texts, stats)
+        self.order = np.concatenate([self.order, np.arange(self.size, self.size + len(rows))])
+        self.size += len(rows)
+        self.endInsertRows()
+
+        if self.sort_column >= 0:
+            self.sort(self.sort_column, self.sort_order)
+
+    def set_row(self, row: int, name: str, data, texts=None, stats=None):
+        """ Replace result with given insertion index. """
+        self.store(row, name, data, texts, stats)
+        view_row = int(np.flatnonzero(self.order == row)[0])
+        self.dataChanged.emit(self.index(view_row, 0), self.index(view_row, len(HEADER) - 1))
+
+        if self.sort_column >= 0:
+            self.sort(self.sort_column, self.sort_order)
+
+    def remove_rows(self, rows: Iterable[int]):
+        """ Remove results with given insertion indexes, following results are renumbered. """
+        rows = sorted(set(rows))
+        if not rows:
+            return
+
+        self.beginResetModel()
+        keep = np.setdiff1d(np.arange(self.size), rows)
+        for text_column in self.text_columns:
+            text_column[:] = [text_column[row] for row in keep]
+        for name in NUMERIC_COLUMNS.values():
+            getattr(self, name)[:len(keep)] = getattr(self, name)[keep]
+
+        # renumber remaining rows of current order
+        order = self.order[np.isin(self.order, rows, invert=True)]
+        self.order = np.searchsorted(keep, order)
+        self.size = len(keep)
+        self.endResetModel()
+
+    def sort(self, column: int, order=QtCore.Qt.AscendingOrder):
+        """ Sort rows of view, column -1 restores insertion order. """
+        self.sort_column, self.sort_order = column, order
+
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        rows = [int(self.order[index.row()]) for index in persistent]
+
+        descending = column >= 0 and order == QtCore.Qt.DescendingOrder
+        if column < 0:
+            self.order = np.arange(self.size)
+        elif column in NUMERIC_COLUMNS:
+            values = getattr(self, NUMERIC_COLUMNS[column])[:self.size]
+            self.order = np.argsort(values, kind='stable')
+            if descending:
+                # unknown values (NaN) stay at the end
+                known = self.size - np.count_nonzero(np.isnan(values))
+                self.order = np.concatenate([self.order[:known][::-1], self.order[known:]])
+        else:
+            values = self.text_columns[self.text_index.index(column)]
+            self.order = np.array(sorted(range(self.size), key=values.__getitem__, reverse=descending), dtype=int)
+
+        positions = np.empty(self.size, dtype=int)
+        positions[self.order] = np.arange(self.size)
+        self.changePersistentIndexList(persistent, [self.index(int(positions[row]), index.column())
+                                                    for row, index in zip(rows, persistent)])
+        self.layoutChanged.emit()
+
+    def save_csv(self, file_path: Path):
+        """ Save table in order of view. """
+        save_parameters(file_path, zip(*(self.column(column) for column in range(len(HEADER)))))
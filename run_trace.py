@@ -0,0 +1,181 @@
+r"""
+Opt-in trace of the session as JSON lines.
+
+Every line is one event with wall clock timestamp, session id, process and thread, name of event and its fields, spans
+also have duration in seconds. Tracing is enabled by TRACER_GUI_TRACE (path of the trace file, events are appended to
+it) or by start. When it is disabled, event returns immediately and span returns shared context manager doing nothing.
+
+Summary of slow paths in trace files of several sessions:
+    python run_trace.py trace.jsonl other_trace.jsonl
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import settings
+
+NULL_SPAN = contextlib.nullcontext()
+
+
+class TraceWriter:
+    """ Append events to file, the file is opened with the first event. Safe to use from several threads. """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.session = uuid.uuid4().hex[:12]
+        self.file = None
+        self.lock = threading.Lock()
+
+    def write(self, name: str, fields: dict):
+        record = {'ts': round(time.time(), 6), 'session': self.session, 'pid': os.getpid(),
+                  'thread': threading.current_thread().name, 'event': name}
+        record.update(fields)
+        line = json.dumps(record, default=str) + '\n'
+
+        with self.lock:
+            try:
+                if self.file is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self.file = open(self.path, 'a', encoding='utf-8')
+                self.file.write(line)
+                # other sessions append to the same file, lines are written whole
+                self.file.flush()
+            except OSError:
+                pass
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class Span:
+    """ Context manager writing event with duration of its block, failed blocks have error field. """
+
+    def __init__(self, writer: TraceWriter, name: str, fields: dict):
+        self.writer = writer
+        self.name = name
+        self.fields = fields
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.fields['duration'] = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        self.writer.write(self.name, self.fields)
+
+        return False
+
+
+writer: Optional[TraceWriter] = TraceWriter(settings.TRACE_FILE) if settings.TRACE_FILE else None
+
+
+def start(path: str):
+    """ Enable tracing to file. """
+    global writer
+    stop()
+    writer = TraceWriter(path)
+
+
+def stop():
+    """ Disable tracing. """
+    global writer
+    if writer is not None:
+        writer.close()
+    writer = None
+
+
+def enabled() -> bool:
+    return writer is not None
+
+
+def event(name: str, **fields):
+    """ Write single event if tracing is enabled. """
+    if writer is not None:
+        writer.write(name, fields)
+
+
+def span(name: str, **fields):
+    """
+    Trace duration of block:
+
+        with span('load_file', path=str(path)):
+            ...
+    """
+    if writer is None:
+        return NULL_SPAN
+
+    return Span(writer, name, fields)
+
+
+def read_events(paths: Iterable[str]) -> List[dict]:
+    """ Events of trace files, damaged lines are skipped. """
+    events = []
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+
+    return events
+
+
+def summarize(events: Iterable[dict]) -> Dict[str, dict]:
+    """
+    Durations of events by name, fits are grouped also by model and phase, cached loads separately.
+
+    :return: count, total, median, 95th percentile and maximum of durations in seconds
+    """
+    durations = defaultdict(list)
+    for record in events:
+        duration = record.get('duration', record.get('wall_time'))
+        if duration is not None:
+            name = ' '.join([record['event']] + [str(record[key]) for key in ('model', 'phase') if key in record])
+            # loads served from cache are much faster than parsing, they are not mixed with it
+            if record.get('cached'):
+                name += ' cached'
+            durations[name].append(duration)
+
+    summary = {}
+    for name, values in durations.items():
+        values.sort()
+        summary[name] = {'count': len(values), 'total': sum(values), 'median': statistics.median(values),
+                         'p95': values[min(int(0.95 * len(values)), len(values) - 1)], 'max': values[-1]}
+
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Summarize durations of traced events, slowest in total first.')
+    parser.add_argument('traces', nargs='+', help='trace files')
+    args = parser.parse_args(argv)
+
+    events = read_events(args.traces)
+    summary = summarize(events)
+    print(f'{len(events)} events of {len({record.get("session") for record in events})} sessions')
+    print(f'{"event":24} {"count":>7} {"total":>10} {"median":>10} {"p95":>10} {"max":>10}')
+    for name, values in sorted(summary.items(), key=lambda item: -item[1]['total']):
+        print(f'{name:24} {values["count"]:7} {values["total"]:10.4f} {values["median"]:10.4f} '
+              f'{values["p95"]:10.4f} {values["max"]:10.4f}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""
+Session file with all results, their model configurations and hashes of source files.
+
+File starts with a header: magic, version and length of JSON metadata (names, model types, configurations, sources and
+description of arrays), which is followed by float/integer arrays stored by columns, aligned to 8 bytes. Scalar
+columns are read on load, curves are memory-mapped and read only when result is plotted or exported. Every distinct
+data series is stored once, so e.g. time grid of outputs and observations of well fitted by several models are shared.
+"""
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from archive import MAX_PARAMS
+from fit_stats import FitStats
+from fit_stats import stats_from_values
+from fit_stats import stats_values
+from gui_utils import MODELS_PARAMS
+from gui_utils import parse_models_configs
+from result_cache import series_hash
+
+MAGIC = b'TMGSESS1'
+SESSION_VERSION = 1
+HEADER = struct.Struct('<8sIQ')
+ALIGNMENT = 8
+CURVES = ('output', 'response_function', 'observations')
+
+
+class FitConfig(NamedTuple):
+    """ Configuration which produced result. """
+    model: list
+    alpha: float
+    input_file: str
+    observations_file: str
+
+
+class SessionEntry(NamedTuple):
+    """ Result saved in session. """
+    name: str
+    data: object
+    stats: Optional[FitStats]
+    config: Optional[FitConfig]
+    checked: bool
+
+
+def file_hash(path: str) -> Optional[str]:
+    """ SHA-1 of file's content, None if it cannot be read. """
+    digest = hashlib.sha1()
+    try:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(2 ** 20), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+
+    return digest.hexdigest()
+
+
+class SessionFile:
+    """ Opened session file, curves are memory-mapped. """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, 'rb') as file:
+            try:
+                magic, version, length = HEADER.unpack(file.read(HEADER.size))
+            except struct.error:
+                raise ValueError(f'{path.name} is not a session file')
+            if magic != MAGIC:
+                raise ValueError(f'{path.name} is not a session file')
+            if version > SESSION_VERSION:
+                raise ValueError(f'{path.name} was saved by newer version of the program')
+            self.meta = json.loads(file.read(length).decode('utf-8'))
+
+        self.data_offset = aligned(HEADER.size + length)
+
+    def array(self, name: str, load: bool = True) -> np.ndarray:
+        """
+        :param name: name of column
+        :param load: read column into memory, otherwise it is memory-mapped
+        """
+        dtype, shape, offset = self.meta['arrays'][name]
+        if not np.prod(shape):
+            return np.empty(shape, dtype=dtype)
+
+        array = np.memmap(self.path, dtype=dtype, mode='r', offset=self.data_offset + offset, shape=tuple(shape))
+
+        return np.array(array) if load else array
+
+
+class SeriesPool:
+    """
+    Distinct data series of session concatenated in single array.
+
+    Rows of series i are values[offsets[i]:offsets[i + 1]], series of result j is series index[j].
+    """
+
+    def __init__(self):
+        self.series = []
+        self.keys = {}
+        # series shared by results (interned in SeriesStore) are hashed once; the series is kept with its index, so its
+        # id is not reused by another array while saving (loaded results create new arrays on every access)
+        self.shared = {}
+        self.index = []
+
+    def add(self, series):
+        seen = self.shared.get(id(series))
+        if seen is not None and seen[0] is series:
+            self.index.append(seen[1])
+            return
+
+        key = series_hash([series])
+        if key not in self.keys:
+            self.keys[key] = len(self.series)
+            self.series.append(series)
+        self.shared[id(series)] = (series, self.keys[key])
+        self.index.append(self.keys[key])
+
+    def columns(self, name: str) -> Dict[str, np.ndarray]:
+        offsets = np.zeros(len(self.series) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(series) for series in self.series])
+        values = np.concatenate([np.asarray(series, dtype=float) for series in self.series]) if self.series else \
+            np.empty(0)
+
+        return {name: values, f'{name}_offsets': offsets, f'{name}_index': np.array(self.index, dtype=np.int32)}
+
+
+class LazySeries:
+    """ Series of SeriesPool in opened session, values are read when they are needed. """
+
+    def __init__(self, session: SessionFile, name: str):
+        self.values = session.array(name, load=False)
+        self.offsets = session.array(f'{name}_offsets')
+        self.index = session.array(f'{name}_index')
+
+    def __getitem__(self, result: int) -> np.ndarray:
+        series = self.index[result]
+        return np.asarray(self.values[self.offsets[series]:self.offsets[series + 1]])
+
+
+class LazyCurves:
+    """ Curves of results in opened session, x and y of single curve are read when they are needed. """
+
+    def __init__(self, session: SessionFile, name: str):
+        self.x = LazySeries(session, f'{name}_x')
+        self.y = LazySeries(session, f'{name}_y')
+
+    def __getitem__(self, result: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.x[result], self.y[result]
+
+
+class SessionResult:
+    """ Fitting result loaded from session, with the attributes of FittingResult used by GUI and exports. """
+
+    __slots__ = ('model_type', 'params', 'mse', 'model_efficiency', 'beta', 'confidence_interval', 'confidence_level',
+                 'curves')
+
+    def __init__(self, model_type: str, params: list, mse: float, model_efficiency: float, beta: Optional[float],
+                 confidence_interval: Optional[list], confidence_level: Optional[list], curves: Dict[str, tuple]):
+        """
+        :param curves: name of curve ('output', 'observations', 'response_function') to (LazyCurves, index)
+        """
+        self.model_type = model_type
+        self.params = params
+        self.mse = mse
+        self.model_efficiency = model_efficiency
+        self.beta = beta
+        self.confidence_interval = confidence_interval
+        self.confidence_level = confidence_level
+        self.curves = curves
+
+    def curve(self, name: str):
+        curves, index = self.curves[name]
+        return curves[index]
+
+    @property
+    def output(self):
+        return self.curve('output')
+
+    @property
+    def observations(self):
+        return self.curve('observations')
+
+    @property
+    def response_function(self):
+        return None if self.model_type == 'PFM' else self.curve('response_function')
+
+
+def aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_session(file_path: Path, entries: List[SessionEntry], on_progress: Optional[Callable] = None,
+                 cancelled: Optional[threading.Event] = None) -> bool:
+    """
+    Save results to session file, the file is replaced only when it is completely written.
+
+    :param file_path: path of session file
+    :param entries: results in order of results list
+    :param on_progress: called with number of processed results
+    :param cancelled: event which stops saving, file is not written then
+    :return: True if session was written
+    """
+    n = len(entries)
+    columns = {
+        'params': np.full((n, MAX_PARAMS), np.nan),
+        'uncertainty': np.zeros(n, dtype=np.uint8),
+        'confidence_interval': np.full((n, MAX_PARAMS, 2), np.nan),
+        'confidence_level': np.full((n, MAX_PARAMS), np.nan),
+        'beta': np.full(n, np.nan),
+        'mse': np.empty(n),
+        'me': np.empty(n),
+        'stats': np.full((n, len(FitStats._fields)), np.nan),
+        'config': np.full(n, -1, dtype=np.int32),
+        'checked': np.zeros(n, dtype=np.uint8),
+    }
+    configs, config_indexes = [], {}
+    sources, source_indexes = [], {}
+    pools = {f'{name}_{axis}': SeriesPool() for name in CURVES for axis in 'xy'}
+
+    def source_index(path: str) -> int:
+        if path not in source_indexes:
+            source_indexes[path] = len(sources)
+            sources.append({'path': path, 'sha1': file_hash(path) if path else None})
+        return source_indexes[path]
+
+    for index, entry in enumerate(entries):
+        if cancelled is not None and cancelled.is_set():
+            return False
+
+        data = entry.data
+        columns['params'][index, :len(data.params)] = data.params
+        if data.confidence_interval:
+            columns['uncertainty'][index] = 1
+            columns['confidence_interval'][index, :len(data.confidence_interval)] = data.confidence_interval
+            columns['confidence_level'][index, :len(data.confidence_level)] = data.confidence_level
+        if data.beta is not None:
+            columns['beta'][index] = data.beta
+        columns['mse'][index] = data.mse
+        columns['me'][index] = data.model_efficiency
+        columns['stats'][index] = stats_values(entry.stats)
+        columns['checked'][index] = entry.checked
+
+        if entry.config is not None:
+            config = {'model': entry.config.model, 'alpha': entry.config.alpha,
+                      'input': source_index(entry.config.input_file),
+                      'observations': source_index(entry.config.observations_file)}
+            key = json.dumps(config)
+            if key not in config_indexes:
+                config_indexes[key] = len(configs)
+                configs.append(config)
+            columns['config'][index] = config_indexes[key]
+
+        for name in CURVES:
+            x, y = getattr(data, name) if name != 'response_function' or data.model_type != 'PFM' else ([], [])
+            pools[f'{name}_x'].add(x)
+            pools[f'{name}_y'].add(y)
+
+        if on_progress:
+            on_progress(index + 1)
+
+    for name, pool in pools.items():
+        columns.update(pool.columns(name))
+
+    arrays, offset = {}, 0
+    for name, column in columns.items():
+        column = np.ascontiguousarray(column)
+        columns[name] = column
+        arrays[name] = (column.dtype.str, column.shape, offset)
+        offset = aligned(offset + column.nbytes)
+
+    meta = json.dumps({
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'names': [entry.name for entry in entries],
+        'model_types': [entry.data.model_type for entry in entries],
+        'configs': configs,
+        'sources': sources,
+        'arrays': arrays,
+    }).encode('utf-8')
+
+    file_path = Path(file_path)
+    with tempfile.NamedTemporaryFile(dir=file_path.parent, delete=False) as file:
+        try:
+            file.write(HEADER.pack(MAGIC, SESSION_VERSION, len(meta)))
+            file.write(meta)
+            for name, column in columns.items():
+                file.seek(aligned(HEADER.size + len(meta)) + arrays[name][2])
+                file.write(column.data)
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+    os.replace(file.name, file_path)
+
+    return True
+
+
+def load_session(file_path: Path) -> Tuple[List[SessionEntry], List[str]]:
+    """
+    Load results of session, their curves are read when they are used.
+
+    :param file_path: path of session file
+    :return: results and paths of source files which changed or are missing since the session was saved
+    :raise ValueError: if file is not a session file
+    """
+    session = SessionFile(Path(file_path))
+    meta = session.meta
+    columns = {name: session.array(name) for name in ('params', 'uncertainty', 'confidence_interval',
+                                                      'confidence_level', 'beta', 'mse', 'me', 'stats', 'config',
+                                                      'checked')}
+    curves = {name: LazyCurves(session, name) for name in CURVES}
+    configs = [FitConfig(parse_models_configs([config['model']])[0], config['alpha'],
+                         meta['sources'][config['input']]['path'], meta['sources'][config['observations']]['path'])
+               for config in meta['configs']]
+
+    entries = []
+    for index, (name, model_type) in enumerate(zip(meta['names'], meta['model_types'])):
+        size = len(MODELS_PARAMS[model_type]['csv'])
+        uncertainty = bool(columns['uncertainty'][index])
+        data = SessionResult(
+            model_type, columns['params'][index, :size].tolist(), float(columns['mse'][index]),
+            float(columns['me'][index]),
+            None if np.isnan(columns['beta'][index]) else float(columns['beta'][index]),
+            [tuple(i) for i in columns['confidence_interval'][index, :size].tolist()] if uncertainty else None,
+            columns['confidence_level'][index, :size].tolist() if uncertainty else None,
+            {name: (curves[name], index) for name in CURVES})
+
+        entries.append(SessionEntry(name, data, stats_from_values(columns['stats'][index].tolist()),
+                                    configs[columns['config'][index]] if columns['config'][index] >= 0 else None,
+                                    bool(columns['checked'][index])))
+
+    changed = [source['path'] for source in meta['sources']
+               if source['path'] and file_hash(source['path']) != source['sha1']]
+
+    return entries, changed
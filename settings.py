@@ -0,0 +1,39 @@
+import os
+
+# Executor backend used for model fits: 'serial', 'thread' or 'process'.
+EXECUTOR_BACKEND = os.environ.get('TRACER_GUI_BACKEND', 'process')
+
+# Number of workers of the thread/process pool, 0 means one worker per CPU core.
+EXECUTOR_WORKERS = int(os.environ.get('TRACER_GUI_WORKERS', '0'))
+
+# Memory limit of parsed input/observations files kept in memory, in megabytes.
+PARSED_CACHE_SIZE = int(os.environ.get('TRACER_GUI_PARSED_CACHE_SIZE', '256'))
+
+# Keep binary copies of parsed files in SIDECAR_CACHE_DIR and map them into memory instead of parsing spreadsheets.
+SIDECAR_CACHE = os.environ.get('TRACER_GUI_SIDECAR_CACHE', '0') == '1'
+SIDECAR_CACHE_DIR = os.environ.get('TRACER_GUI_SIDECAR_CACHE_DIR',
+                                   os.path.join(os.path.expanduser('~'), '.cache', 'tracer_method_gui'))
+
+# Number of fitting results kept in memory for repeated runs with the same configuration.
+RESULT_CACHE_ENTRIES = int(os.environ.get('TRACER_GUI_RESULT_CACHE_ENTRIES', '256'))
+
+# Directory where fitting results are also persisted between sessions, empty disables it.
+RESULT_CACHE_DIR = os.environ.get('TRACER_GUI_RESULT_CACHE_DIR', '')
+
+# Convolution of input with response functions in the GUI's own model evaluations: 'fft' or 'direct'.
+CONVOLUTION_ENGINE = os.environ.get('TRACER_GUI_CONVOLUTION_ENGINE', 'fft')
+
+# Number of grid points per parameter in grid sweep mode.
+SWEEP_POINTS = int(os.environ.get('TRACER_GUI_SWEEP_POINTS', '60'))
+
+# Number of threads writing exported results, writing files is limited by disk rather than CPU.
+EXPORT_WORKERS = int(os.environ.get('TRACER_GUI_EXPORT_WORKERS', '4'))
+
+# JSON-lines file to which events of the session are appended for performance analysis, empty disables tracing.
+TRACE_FILE = os.environ.get('TRACER_GUI_TRACE', '')
+
+# Trace memory of calculations, exports and plots with tracemalloc and show it in diagnostics panel, it slows them down.
+MEMORY_PROFILE = os.environ.get('TRACER_GUI_MEMORY_PROFILE', '0') == '1'
+
+# Keep fitted curves of results in float32 instead of float64, time grids and observations stay in float64.
+FLOAT32_CURVES = os.environ.get('TRACER_GUI_FLOAT32_CURVES', '0') == '1'
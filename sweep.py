@@ -0,0 +1,90 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+import settings
+from convolution import simulate
+
+# number of parameter sets evaluated in single call, limits memory used by outputs
+BATCH_SIZE = 1024
+
+
+def observations_interpolation(grid: np.ndarray, x) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Indices and weights of linear interpolation of values on uniform grid at observations times.
+
+    :param grid: uniform time grid
+    :param x: observations times
+    :return: lower indices, upper indices, weights of upper values
+    """
+    position = np.clip((np.asarray(x, dtype=np.float64) - grid[0]) / (grid[1] - grid[0]), 0, grid.size - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, grid.size - 1)
+
+    return lower, upper, position - lower
+
+
+def evaluate(model_type: str, params: np.ndarray, input, obs, alpha: float = 1.0,
+             engine: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluate MSE and model efficiency of parameters sets by convolution engine.
+
+    :param params: parameters sets, shape (sets, parameters)
+    :return: MSE and ME of every set
+    """
+    obs_x = np.asarray(obs[0], dtype=np.float64)
+    obs_y = np.asarray(obs[1], dtype=np.float64)
+
+    mse = np.empty(len(params))
+    me = np.empty(len(params))
+    variance = np.sum((obs_y - obs_y.mean()) ** 2)
+    interpolation = None
+
+    for start in range(0, len(params), BATCH_SIZE):
+        grid, output = simulate(model_type, params[start:start + BATCH_SIZE], input[0], input[1], engine, alpha=alpha)
+        if interpolation is None:
+            interpolation = observations_interpolation(grid, obs_x)
+
+        lower, upper, weight = interpolation
+        simulated = output[:, lower] * (1 - weight) + output[:, upper] * weight
+        squared_error = np.sum((simulated - obs_y) ** 2, axis=1)
+
+        mse[start:start + BATCH_SIZE] = squared_error / obs_y.size
+        me[start:start + BATCH_SIZE] = 1 - squared_error / variance if variance else np.nan
+
+    return mse, me
+
+
+def grid_sweep(model_type: str, bounds: Sequence[Tuple[float, float]], input, obs, alpha: float = 1.0,
+               points: Optional[int] = None, engine: Optional[str] = None, fitted: Optional[Sequence[float]] = None) \
+        -> Dict:
+    """
+    Evaluate MSE and model efficiency on a dense grid of parameters within bounds.
+
+    The convolution engine has no beta, so models fitted with beta are not swept.
+
+    :param model_type: PFM, EM, EPM or DM
+    :param bounds: (lower, upper) bounds of every parameter
+    :param input: input data (time, concentration)
+    :param obs: observations (time, concentration)
+    :param alpha: infiltration coefficient of the fitted model
+    :param points: number of grid points per parameter, default from settings
+    :param engine: convolution engine, default from settings
+    :param fitted: fitted parameters, their MSE is evaluated by the same engine as the grid
+    :return: dict with model type, axes of parameters, arrays of MSE and ME with shape of the grid, fitted parameters
+        and their MSE (None if not given)
+    """
+    points = points or settings.SWEEP_POINTS
+    axes = [np.linspace(lower, upper, points) for lower, upper in bounds]
+    params = np.stack([i.ravel() for i in np.meshgrid(*axes, indexing='ij')], axis=1)
+    mse, me = evaluate(model_type, params, input, obs, alpha, engine)
+
+    fitted_mse = None
+    if fitted is not None:
+        fitted = [float(i) for i in fitted]
+        fitted_mse = float(evaluate(model_type, np.array([fitted]), input, obs, alpha, engine)[0][0])
+
+    shape = tuple(points for _ in axes)
+
+    return {'model_type': model_type, 'axes': axes, 'mse': mse.reshape(shape), 'me': me.reshape(shape),
+            'fitted': fitted, 'fitted_mse': fitted_mse}